@@ -0,0 +1,196 @@
+import os
+import time
+import numpy as np
+from scoring import FeatureMatrix, select_top_k
+
+# ===============================
+# Approximate Nearest Neighbours
+# ===============================
+#
+# A record's score is sum_g w_g * cos(q_g, r_g). With every group of a row
+# scaled to unit length (R) and every group of the query scaled by w_g / |q_g|
+# (Q), that is exactly the dot product Q . R. Random-projection LSH (SimHash)
+# hashes R into `tables` codes of `bits` sign bits each; a query only scores
+# the rows sharing a code with it in some table (plus, with probes=1, every
+# code one bit away), and those candidates are ranked exactly.
+#
+# On catalogs of tens of thousands of rows probes=0 with ~128-row buckets
+# scores 20-30% of the rows; probes=1 would score 70-90%, more than a plain
+# scan costs.
+#
+# More tables or probes raise recall and candidates; more bits shrink the
+# buckets and lower both. recall_at_k() measures the trade-off against the
+# exact engine.
+
+ANN_VERSION = 1
+ANN_FILE = "ann_index.npz"
+
+DEFAULT_TABLES = int(os.environ.get("MATCHMAKER_ANN_TABLES", "8"))
+# Unset: probes=1 from PROBE_MIN_ROWS rows up, 0 below (see auto_probes)
+PROBES = os.environ.get("MATCHMAKER_ANN_PROBES")
+PROBE_MIN_ROWS = 250000
+# Rows per bucket aimed for when bits are picked automatically
+TARGET_BUCKET_SIZE = 128
+# Gathering candidates costs more per row than a plain scan: an index that
+# scans a larger share of its rows than this is slower than exact search,
+# so script.py does not save it and approx requests rank exactly instead
+MAX_SCANNED_FRACTION = float(os.environ.get("MATCHMAKER_ANN_MAX_SCANNED", "0.35"))
+# Rows hashed per matrix product while building
+HASH_CHUNK = 65536
+
+def auto_bits(n_rows: int) -> int:
+    return int(np.clip(np.round(np.log2(max(n_rows, 1) / TARGET_BUCKET_SIZE)), 4, 32))
+
+def auto_probes(n_rows: int) -> int:
+    """
+    Probes per table. With buckets of a few hundred rows, one-bit probes
+    pull in most of a small catalog; they only pay off on large ones.
+    """
+    if PROBES is not None:
+        return int(PROBES)
+    return 1 if n_rows >= PROBE_MIN_ROWS else 0
+
+class LSHIndex:
+    """
+    SimHash tables over a FeatureMatrix. search() takes the same arguments
+    and returns the same shapes as InvertedIndex.search, but only ranks the
+    candidate rows, so some true top-k rows can be missed.
+    """
+
+    def __init__(self, matrix: FeatureMatrix, tables=DEFAULT_TABLES, bits=None, seed=0,
+                 projections=None, codes=None):
+        self.matrix = matrix
+        if projections is None:
+            bits = bits or auto_bits(len(matrix))
+            rng = np.random.default_rng(seed)
+            projections = rng.standard_normal((tables, bits, matrix.width)).astype(np.float32)
+        self.projections = projections  # tables x bits x D
+        self.tables, self.bits = projections.shape[:2]
+        self.probes = auto_probes(len(matrix))
+        self._weights = np.left_shift(np.uint64(1), np.arange(self.bits, dtype=np.uint64))
+
+        # Column -> feature group, to scale each group of a row to unit length
+        self._column_groups = np.concatenate([
+            np.full(s.stop - s.start, g) for g, s in enumerate(matrix.slices[k] for k in matrix.keys)
+        ])
+        self.codes = codes if codes is not None else self._hash_rows()  # N x tables, uint64
+
+        self._order = np.argsort(self.codes, axis=0, kind="stable").T  # tables x N
+        self._sorted = np.take_along_axis(self.codes, self._order.T, axis=0).T
+
+    def _hash(self, vectors: np.ndarray) -> np.ndarray:
+        """Codes (n x tables) of row-shaped vectors (n x D)."""
+        signs = np.einsum("nd,tbd->ntb", vectors, self.projections) > 0
+        return (signs * self._weights).sum(axis=2, dtype=np.uint64)
+
+    def _hash_rows(self) -> np.ndarray:
+        codes = np.zeros((len(self.matrix), self.tables), dtype=np.uint64)
+        for start in range(0, len(self.matrix), HASH_CHUNK):
+            rows = slice(start, start + HASH_CHUNK)
+            scale = self.matrix.inv_norms(rows)[:, self._column_groups]
+            codes[rows] = self._hash(self.matrix.dense(rows).astype(np.float32) * scale.astype(np.float32))
+        return codes
+
+    def candidates(self, query, probes=None) -> np.ndarray:
+        """Sorted rows sharing a bucket with the query in any table (probes: see auto_probes)."""
+        probes = self.probes if probes is None else probes
+        scale = (query.inv_norms * query.weights)[self._column_groups]
+        q = query.vector.astype(np.float32) * scale.astype(np.float32)
+        codes = self._hash(q[None, :])[0]
+
+        # A row found in several tables is marked once; cheaper than np.unique
+        # over the concatenated buckets, which sorts every duplicate
+        found = np.zeros(len(self.matrix), dtype=bool)
+        for t, code in enumerate(codes):
+            probe_codes = np.array([code], dtype=np.uint64)
+            if probes:
+                probe_codes = np.concatenate([probe_codes, code ^ self._weights])
+            lo = np.searchsorted(self._sorted[t], probe_codes, side="left")
+            hi = np.searchsorted(self._sorted[t], probe_codes, side="right")
+            for a, b in zip(lo, hi):
+                found[self._order[t][a:b]] = True
+        return np.flatnonzero(found)
+
+    def search(self, encoded_input: dict, k=None, min_score=None, with_similarities=False, probes=None,
+               feature_weights=None):
+        query = self.matrix.prepare(encoded_input, feature_weights)
+        rows = self.candidates(query, probes)
+        scores, sims = self.matrix.score_rows(query, rows, return_similarities=True)
+
+        if k is None:
+            keep = scores > min_score if min_score is not None else slice(None)
+        else:
+            keep = select_top_k(scores, k, min_score=min_score)
+        if with_similarities:
+            return rows[keep], scores[keep], sims[keep]
+        return rows[keep], scores[keep]
+
+# ===============================
+# Persistence
+# ===============================
+
+def save_ann(path: str, indexes: dict):
+    """indexes: name ("investor" / "startup") -> LSHIndex."""
+    arrays = {"version": np.array(ANN_VERSION)}
+    for name, index in indexes.items():
+        arrays[f"{name}_projections"] = index.projections
+        arrays[f"{name}_codes"] = index.codes
+    with open(path, "wb") as f:
+        np.savez(f, **arrays)
+
+def load_ann(path: str, matrices: dict) -> dict:
+    """
+    LSHIndex per name for the given FeatureMatrix objects. Indexes missing
+    from the file or built for a different catalog shape are left out.
+    """
+    if not os.path.exists(path):
+        return {}
+    indexes = {}
+    with np.load(path, allow_pickle=False) as f:
+        if int(f["version"]) != ANN_VERSION:
+            return {}
+        for name, matrix in matrices.items():
+            if f"{name}_codes" not in f.files:
+                continue
+            projections, codes = f[f"{name}_projections"], f[f"{name}_codes"]
+            if len(codes) != len(matrix) or projections.shape[2] != matrix.width:
+                continue
+            indexes[name] = LSHIndex(matrix, projections=projections, codes=codes)
+    return indexes
+
+# ===============================
+# Recall Check
+# ===============================
+
+def encoded_rows(matrix: FeatureMatrix, rows) -> list:
+    """processed["encoded"]-shaped dicts for matrix rows, usable as queries."""
+    blocks = {key: matrix.block(key, rows) for key in matrix.keys}
+    return [{key: blocks[key][i].tolist() for key in matrix.keys} for i in range(len(rows))]
+
+def recall_at_k(index: LSHIndex, queries: list, k=10, min_score=None, probes=None) -> dict:
+    """
+    Mean recall@k of index.search against an exact full scan, the mean share
+    of rows scored, and mean latency of both, over the given encoded queries.
+    """
+    recalls, scanned, approx_ms, exact_ms = [], [], [], []
+    for encoded in queries:
+        t = time.perf_counter()
+        exact = select_top_k(index.matrix.score(encoded), k, min_score=min_score)
+        exact_ms.append((time.perf_counter() - t) * 1000)
+
+        t = time.perf_counter()
+        rows, _ = index.search(encoded, k=k, min_score=min_score, probes=probes)
+        approx_ms.append((time.perf_counter() - t) * 1000)
+
+        scanned.append(len(index.candidates(index.matrix.prepare(encoded), probes)) / max(len(index.matrix), 1))
+        if len(exact):
+            recalls.append(len(np.intersect1d(rows, exact)) / len(exact))
+
+    return {
+        "k": k,
+        "queries": len(queries),
+        "recall": round(float(np.mean(recalls)), 4) if recalls else None,
+        "scanned_fraction": round(float(np.mean(scanned)), 4) if scanned else None,
+        "approx_ms": round(float(np.mean(approx_ms)), 3) if approx_ms else None,
+        "exact_ms": round(float(np.mean(exact_ms)), 3) if exact_ms else None,
+    }
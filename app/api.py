@@ -1,113 +1,209 @@
 from flask import Flask, request, jsonify, Blueprint
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-from schemas import validate_recommend_request
-from recommender_engine import get_recommendations, INVESTORS
+from schemas import validate_recommend_batch, validate_sweep_request
+from recommender_engine import get_batch_recommendations, find_investor, find_startup, autocomplete, cache_stats
+from recommender_engine import reload_in_background, reload_status, watch_data_files
+from recommender_engine import sweep_recommendations
+from recommender_engine import current_snapshot
+from recommend_handlers import recommend, recommend_page
+from instrumentation import track_request, stage, metrics_snapshot
+from responses import dumps, investor_detail, startup_detail
+from startup import startup_report
 import os
-import json
+import gzip
+import hmac
+import logging
 
 
+class CompactJSONProvider(DefaultJSONProvider):
+    """jsonify() through responses.dumps: compact, unsorted, orjson when installed."""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj, default=self.default).decode("utf-8")
+
 app = Flask(__name__)
 CORS(app)
-app.config['JSONIFY_PRETTYPRINT_REGULAR'] = True
-
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_DIR = os.path.join(BASE_DIR, "data")
+app.json = CompactJSONProvider(app)
 
 api = Blueprint('api', __name__)
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SIZE = 1000
+
+# /admin routes need this token in X-Admin-Token; without one they only answer loopback clients
+ADMIN_TOKEN = os.environ.get("MATCHMAKER_ADMIN_TOKEN")
+# Seconds between checks of the data files for a new catalog build; 0 disables watching
+WATCH_INTERVAL = float(os.environ.get("MATCHMAKER_WATCH_INTERVAL", "0"))
+
+# Gzip response bodies of at least this many bytes for clients that accept it; 0 disables
+GZIP_MIN_BYTES = int(os.environ.get("MATCHMAKER_GZIP_MIN_BYTES", "0"))
+GZIP_LEVEL = 5
+
+# serve.py replaces this in pre-forked workers so the master performs the reload
+reload_catalog = reload_in_background
+
+def _admin_allowed():
+    if ADMIN_TOKEN:
+        return hmac.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN)
+    return request.remote_addr in ("127.0.0.1", "::1")
+
+def json_response(body: bytes, status=200, etag=None):
+    """
+    Response for an already serialized JSON body. GET responses carry a strong
+    ETag (etag, or a hash of the body) and answer a matching If-None-Match
+    with 304; large bodies are gzipped when GZIP_MIN_BYTES is set.
+    """
+    response = app.response_class(body, status=status, mimetype="application/json")
+    if GZIP_MIN_BYTES and len(body) >= GZIP_MIN_BYTES:
+        response.vary.add("Accept-Encoding")
+        if "gzip" in request.accept_encodings:
+            # mtime=0 keeps the output, and so the ETag, identical between calls
+            response.set_data(gzip.compress(body, GZIP_LEVEL, mtime=0))
+            response.content_encoding = "gzip"
+            if etag is not None:
+                etag += "-gzip"
+    if request.method == "GET" and status == 200:
+        if etag is None:
+            response.add_etag()
+        else:
+            response.set_etag(etag)
+        response.make_conditional(request)
+    return response
+
+def _query_flag(name):
+    return request.args.get(name, "").lower() in ("1", "true", "yes")
+
+def _wants_explain():
+    return _query_flag("explain")
 
 @api.route("/recommend", methods=["POST"])
 def recommend_route():
-    json_data = request.get_json()
-    print("\n🔵 Received POST /recommend with data:")
-    print(json_data)
-
-    if not json_data:
-        print("❌ No JSON received.")
-        return jsonify({"error": "Empty request"}), 400
-
-    validated_data, errors = validate_recommend_request(json_data)
-    if errors:
-        print("❌ Validation errors:")
-        print(errors)
-        return jsonify({"error": "Invalid payload", "details": errors}), 400
-
-    print("✅ Validated & Preprocessed Input:")
-    print(validated_data.get("processed", {}))
-
-    try:
-        results = get_recommendations(validated_data)
-        print(f"✅ Generated {len(results)} recommendations.")
-        return jsonify({"recommendations": results}), 200
-    
-    except Exception as e:
-        print("🔥 ERROR during recommendation:")
-        import traceback
-        traceback.print_exc()
-        return jsonify({"error": "Internal server error", "message": str(e)}), 500
+    with track_request("/recommend"):
+        status, body = recommend(request.get_json(), _wants_explain())
+        return json_response(body, status)
+
+@api.route("/recommend/page", methods=["GET"])
+def recommend_page_route():
+    """Next page of a paginated /recommend, from the next_cursor of the previous one."""
+    with track_request("/recommend/page"):
+        status, body = recommend_page(request.args.get("cursor", ""))
+        return json_response(body, status)
+
+@api.route("/recommend/batch", methods=["POST"])
+def recommend_batch_route():
+    with track_request("/recommend/batch"):
+        json_data = request.get_json(silent=True)
+
+        if not isinstance(json_data, list) or not json_data:
+            return jsonify({"error": "Expected a non-empty JSON list of recommend payloads"}), 400
+        if len(json_data) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"Batch too large (max {MAX_BATCH_SIZE} items)"}), 400
+
+        validated = validate_recommend_batch(json_data)
+        valid_items = [data for data, errors in validated if not errors]
+
+        try:
+            recommendations = iter(get_batch_recommendations(valid_items, as_json=True))
+        except Exception as e:
+            logger.exception("Batch recommendation failed")
+            return jsonify({"error": "Internal server error", "message": str(e)}), 500
+
+        with stage("serialize"):
+            results = []
+            for data, errors in validated:
+                if errors:
+                    results.append(dumps({"error": "Invalid payload", "details": errors}))
+                else:
+                    results.append(b'{"recommendations":' + next(recommendations) + b"}")
+            return json_response(b'{"results":[' + b",".join(results) + b"]}")
+
+@api.route("/recommend/sweep", methods=["POST"])
+def recommend_sweep_route():
+    """Rankings of one /recommend payload under every feature weight set in "weightSets", from one scan."""
+    with track_request("/recommend/sweep"):
+        json_data = request.get_json(silent=True)
+        if not isinstance(json_data, dict) or not json_data:
+            return jsonify({"error": "Empty request"}), 400
+
+        validated_data, errors = validate_sweep_request(json_data)
+        if errors:
+            return jsonify({"error": "Invalid payload", "details": errors}), 400
+        if _wants_explain():
+            validated_data["explain"] = True
+
+        weight_sets = validated_data["weightSets"]
+        try:
+            rankings = sweep_recommendations(validated_data, weight_sets, as_json=True)
+        except Exception as e:
+            logger.exception("Sweep failed")
+            return jsonify({"error": "Internal server error", "message": str(e)}), 500
+
+        with stage("serialize"):
+            results = [
+                b'{"featureWeights":' + dumps(weights) + b',"recommendations":' + ranking + b"}"
+                for weights, ranking in zip(weight_sets, rankings)
+            ]
+            return json_response(b'{"sweep":[' + b",".join(results) + b"]}")
+
+@api.route("/metrics", methods=["GET"])
+def metrics_route():
+    return jsonify({**metrics_snapshot(), "result_cache": cache_stats(), "startup": startup_report()}), 200
+
+@api.route("/admin/reload", methods=["GET", "POST"])
+def reload_route():
+    """POST starts a background catalog reload; GET reports the live snapshot."""
+    if not _admin_allowed():
+        return jsonify({"error": "Forbidden"}), 403
+    if request.method == "POST":
+        started = reload_catalog()
+        return jsonify({"started": started, **reload_status()}), 202
+    return jsonify(reload_status()), 200
 
 @api.route("/investor/<string:name>", methods=["GET"])
-def investor_detail(name):
-    name_lower = name.lower()
-
-    for investor in enumerate(INVESTORS):
-        # if investor is a tuple, unpack it
-        if isinstance(investor, tuple):
-            _, investor = investor
-
-        if investor.get("name", "").lower() == name_lower:
-            print(f"✅ Found investor '{name}")
-
-            return jsonify({
-                "name": investor.get("name"),
-                "location": investor.get("location"),
-                "industries": investor.get("industries"),
-                "ticket_size": investor.get("ticket_size"),
-                "num_investments": investor.get("num_investments"),
-                "recent_year": investor.get("recent_year"),
-                "raw": investor.get("processed", {}).get("raw", {})
-            })
-        
+def investor_detail_route(name):
+    investor = find_investor(name)
+    if investor is None:
         return jsonify({"error": "Investor not found"}), 404
+    # The normalized features behind the encoding are only sent on request
+    return json_response(dumps(investor_detail(investor, raw=_query_flag("raw"))))
 
 @api.route("/startup/<string:name>", methods=["GET"])
-def startup_detail(name):
-    name_lower = name.lower()
-    print(f"🔍 Looking for startup: {name_lower}")
-
-    for investor in INVESTORS:
-        for startup in investor.get("Invested Startups", []):
-            if startup.get("Startup Name", "").lower() == name_lower:
-                print(f"✅ Found startup '{name}' under investor {investor.get('Name')}")
-                return jsonify({
-                    "Startup Name": startup.get("Startup Name"),
-                    "Industry": startup.get("Industry"),
-                    "Location": startup.get("Location"),
-                    "Funding Stage": startup.get("Funding Stage"),
-                    "Description": startup.get("Description"),
-                    "Founded Year": startup.get("Founded Year"),
-                    "Team Size": startup.get("Team Size"),
-                    "Revenue Stage": startup.get("Revenue Stage"),
-                    "Business Model": startup.get("Business Model"),
-                    "Customer Segment": startup.get("Customer Segment"),
-                    "Investor": investor.get("Name"),
-                    "Investor Location": investor.get("Location"),
-                }), 200
-
-    print(f"❌ Startup '{name}' not found in any investor's portfolio.")
-    return jsonify({"error": "Startup not found"}), 404
+def startup_detail_route(name):
+    match = find_startup(name)
+    if match is None:
+        return jsonify({"error": "Startup not found"}), 404
+    return json_response(dumps(startup_detail(*match)))
+
+@api.route("/autocomplete", methods=["GET"])
+def autocomplete_route():
+    query = request.args.get("q", "")
+    kind = request.args.get("type", "investor")
+    if kind not in ("investor", "startup"):
+        return jsonify({"error": "type must be 'investor' or 'startup'"}), 400
+    # At least one match: fuzzy lookups (difflib) reject a limit below 1
+    limit = max(1, min(request.args.get("limit", 10, type=int), 50))
+    fuzzy = request.args.get("fuzzy", "false").lower() in ("1", "true", "yes")
+    return jsonify({"matches": autocomplete(query, kind, limit, fuzzy)}), 200
 
 @api.route("/dropdowns", methods=["GET"])
 def dropdown_options():
-    options_path = os.path.join(DATA_DIR, "labels.json")
-    if os.path.exists(options_path):
-        with open(options_path, "r", encoding="utf-8") as f:
-            options = json.load(f)
-        return jsonify(options), 200
-    else:
-        return jsonify({"error": "Dropdown options file not found"}), 404
+    """
+    Label options for the frontend selectors: the table the running encoders
+    were built from, pre-serialized, with its version as the ETag.
+    """
+    snapshot = current_snapshot()
+    response = json_response(snapshot.dropdowns, etag=snapshot.labels_version)
+    # Cacheable, but revalidated on every use, so a 304 is all a page load costs
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    return response
 
 
 app.register_blueprint(api)
 
+if WATCH_INTERVAL > 0:
+    watch_data_files(WATCH_INTERVAL)
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,309 @@
+"""
+Async (ASGI) entry point.
+
+Serves /recommend, /recommend/page, /investor/<name>, /startup/<name>,
+/dropdowns and /metrics from an asyncio event loop under any ASGI server:
+
+    uvicorn asgi:app --app-dir app --port 8000
+
+Lookups, the dropdown table and metrics are answered on the event loop
+itself: each is a dict lookup or an already serialized body. Validation and
+scoring of /recommend run on a bounded pool of scoring threads, so however
+many heavy queries are in flight, the loop stays free for the cheap routes.
+The catalog is loaded at lifespan startup; under a server without lifespan
+events the first request that needs it loads it on a scoring thread too.
+
+Backpressure: at most MATCHMAKER_ASGI_QUEUE scoring requests are admitted at
+once, running or waiting for a thread. The next one is answered 503 with
+Retry-After straight away instead of queueing without bound, and one that
+has not finished within MATCHMAKER_ASGI_TIMEOUT seconds is answered 504.
+
+Batch, sweep, autocomplete and admin routes are served by the Flask app in
+api.py; compression is left to the proxy in front.
+"""
+import os
+import json
+import asyncio
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from recommender_engine import find_investor, find_startup, catalog_loaded
+from recommender_engine import current_snapshot, watch_data_files, cache_stats
+from recommend_handlers import recommend, recommend_page, error_body
+from instrumentation import track_request, metrics_snapshot
+from responses import dumps, investor_detail, startup_detail
+from sharding import close_shard_pool
+from startup import initialize, startup_report
+
+logger = logging.getLogger("matchmaker.asgi")
+
+# Threads validating and scoring /recommend requests
+SCORING_THREADS = int(os.environ.get("MATCHMAKER_ASGI_THREADS", os.cpu_count() or 1))
+# Scoring requests admitted at once, running or waiting for a thread; beyond that, 503
+MAX_PENDING = int(os.environ.get("MATCHMAKER_ASGI_QUEUE", str(SCORING_THREADS * 8)))
+# Seconds a scoring request may take, queueing included, before it is answered 504
+SCORING_TIMEOUT = float(os.environ.get("MATCHMAKER_ASGI_TIMEOUT", "10"))
+# Rank one query of every type at lifespan startup (see startup.py)
+WARMUP = os.environ.get("MATCHMAKER_WARMUP", "0").lower() in ("1", "true", "yes")
+# Seconds between checks of the data files for a new catalog build; 0 disables watching
+WATCH_INTERVAL = float(os.environ.get("MATCHMAKER_WATCH_INTERVAL", "0"))
+MAX_BODY_BYTES = 1 << 20
+
+# ===============================
+# Scoring Pool
+# ===============================
+#
+# A running thread cannot be interrupted, so a request that times out keeps
+# its slot until its thread is done with it; only work still waiting for a
+# thread is dropped. Admission therefore bounds what the threads really
+# have left to do, not just what clients are still waiting for.
+
+class Overloaded(Exception):
+    pass
+
+class ScoringPool:
+    """Runs CPU-bound calls on a fixed set of threads, admitting at most max_pending at once."""
+
+    def __init__(self, threads: int, max_pending: int, timeout: float):
+        self.threads = threads
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.executor = None
+        self.pending = 0  # only touched on the event loop
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def start(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(self.threads, thread_name_prefix="scoring")
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def run(self, fn, *args):
+        """
+        fn(*args) on a scoring thread. Raises Overloaded when max_pending
+        calls are already admitted and TimeoutError after timeout seconds.
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise Overloaded()
+        self.start()
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        future = self.executor.submit(fn, *args)
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future, loop=loop), self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise
+        finally:
+            # Drops the call if no thread has picked it up yet (a timeout or a
+            # cancelled request); a running call finishes and frees its slot
+            future.cancel()
+
+    def _release(self):
+        self.pending -= 1
+        self.completed += 1
+
+    def stats(self) -> dict:
+        return {
+            "threads": self.threads,
+            "max_pending": self.max_pending,
+            "timeout_s": self.timeout,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+SCORING = ScoringPool(SCORING_THREADS, MAX_PENDING, SCORING_TIMEOUT)
+
+# ===============================
+# Scoring Handlers
+# ===============================
+#
+# Run on a scoring thread: parse and time the request, then answer it with
+# the handlers the Flask routes use (recommend_handlers.py).
+
+def _recommend(body: bytes, explain: bool) -> tuple:
+    with track_request("/recommend"):
+        try:
+            json_data = json.loads(body) if body else None
+        except ValueError:
+            return 400, error_body("Invalid JSON")
+        return recommend(json_data, explain)
+
+def _recommend_page(cursor_text: str) -> tuple:
+    with track_request("/recommend/page"):
+        return recommend_page(cursor_text)
+
+# ===============================
+# HTTP
+# ===============================
+
+class _TooLarge(Exception):
+    pass
+
+class Request:
+    def __init__(self, scope):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        self.headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+
+    def arg(self, name: str, default: str = "") -> str:
+        return self.query.get(name, [default])[0]
+
+    def flag(self, name: str) -> bool:
+        return self.arg(name).lower() in ("1", "true", "yes")
+
+async def _read_body(receive):
+    """The request body, or None if the client went away first."""
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise _TooLarge()
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+async def _respond(send, request, status: int, body: bytes, etag=None, headers=()):
+    """
+    Send a JSON response. Like api.json_response, a GET 200 carries a strong
+    ETag (etag, or a hash of the body) and a matching If-None-Match gets 304.
+    """
+    header_list = [(b"access-control-allow-origin", b"*")]
+    header_list.extend((k.encode("latin-1"), v.encode("latin-1")) for k, v in headers)
+    if request.method == "GET" and status == 200:
+        etag = '"%s"' % (etag or hashlib.sha1(body).hexdigest())
+        header_list.append((b"etag", etag.encode("latin-1")))
+        if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+            status, body = 304, b""
+    if status != 304:
+        header_list.append((b"content-type", b"application/json"))
+    header_list.append((b"content-length", str(len(body)).encode("latin-1")))
+    await send({"type": "http.response.start", "status": status, "headers": header_list})
+    await send({"type": "http.response.body", "body": body})
+
+async def _offload(send, request, fn, *args):
+    """Answer with fn(*args) -> (status, body) from the scoring pool."""
+    try:
+        status, body = await SCORING.run(fn, *args)
+    except Overloaded:
+        await _respond(send, request, 503, error_body("Server busy, retry shortly"), headers=[("retry-after", "1")])
+        return
+    except asyncio.TimeoutError:
+        await _respond(send, request, 504, error_body(f"Recommendation timed out after {SCORING.timeout}s"))
+        return
+    await _respond(send, request, status, body)
+
+async def _load_catalog(send, request) -> bool:
+    """
+    Load the catalog on a scoring thread, for a route that reads it on the
+    loop. Only needed without lifespan startup; answers the request and
+    returns False if the load did not finish.
+    """
+    try:
+        await SCORING.run(current_snapshot)
+        return True
+    except Overloaded:
+        await _respond(send, request, 503, error_body("Server busy, retry shortly"), headers=[("retry-after", "1")])
+    except asyncio.TimeoutError:
+        await _respond(send, request, 503, error_body("Catalog still loading, retry shortly"),
+                       headers=[("retry-after", "1")])
+    except Exception as e:
+        logger.exception("Catalog load failed")
+        await _respond(send, request, 500, error_body("Internal server error", message=str(e)))
+    return False
+
+async def _preflight(send, request):
+    """CORS preflight, answered like flask_cors does for api.py."""
+    headers = [("access-control-allow-methods", "GET, POST, OPTIONS")]
+    requested = request.headers.get("access-control-request-headers")
+    if requested:
+        headers.append(("access-control-allow-headers", requested))
+    await _respond(send, request, 200, b"", headers=headers)
+
+async def _route(request, receive, send):
+    path, method = request.path, request.method
+    if method == "GET" and (path == "/dropdowns" or path.startswith(("/investor/", "/startup/"))) \
+            and not catalog_loaded() and not await _load_catalog(send, request):
+        return
+    if method == "OPTIONS":
+        await _preflight(send, request)
+    elif path == "/recommend" and method == "POST":
+        try:
+            body = await _read_body(receive)
+        except _TooLarge:
+            await _respond(send, request, 413, error_body(f"Request body too large (max {MAX_BODY_BYTES} bytes)"))
+            return
+        if body is None:
+            return
+        await _offload(send, request, _recommend, body, request.flag("explain"))
+    elif path == "/recommend/page" and method == "GET":
+        await _offload(send, request, _recommend_page, request.arg("cursor"))
+    elif path.startswith("/investor/") and method == "GET":
+        investor = find_investor(path[len("/investor/"):])
+        if investor is None:
+            await _respond(send, request, 404, error_body("Investor not found"))
+        else:
+            await _respond(send, request, 200, dumps(investor_detail(investor, raw=request.flag("raw"))))
+    elif path.startswith("/startup/") and method == "GET":
+        match = find_startup(path[len("/startup/"):])
+        if match is None:
+            await _respond(send, request, 404, error_body("Startup not found"))
+        else:
+            await _respond(send, request, 200, dumps(startup_detail(*match)))
+    elif path == "/dropdowns" and method == "GET":
+        snapshot = current_snapshot()
+        await _respond(send, request, 200, snapshot.dropdowns, etag=snapshot.labels_version,
+                       headers=[("cache-control", "public, no-cache")])
+    elif path == "/metrics" and method == "GET":
+        body = dumps({**metrics_snapshot(), "result_cache": cache_stats(),
+                      "scoring": SCORING.stats(), "startup": startup_report()})
+        await _respond(send, request, 200, body)
+    elif path in ("/recommend", "/recommend/page", "/dropdowns", "/metrics") or \
+            path.startswith(("/investor/", "/startup/")):
+        await _respond(send, request, 405, error_body("Method not allowed"))
+    else:
+        await _respond(send, request, 404, error_body("Not found"))
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            # Before the server takes traffic, so no request waits for the catalog
+            try:
+                initialize(warmup=WARMUP)
+            except Exception as e:
+                logger.exception("Startup failed")
+                await send({"type": "lifespan.startup.failed", "message": str(e)})
+                return
+            SCORING.start()
+            if WATCH_INTERVAL > 0:
+                watch_data_files(WATCH_INTERVAL)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            SCORING.shutdown()
+            close_shard_pool()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def app(scope, receive, send):
+    """The ASGI application."""
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+    elif scope["type"] == "http":
+        await _route(Request(scope), receive, send)
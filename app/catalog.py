@@ -0,0 +1,127 @@
+import json
+import os
+import time
+from typing import NamedTuple, Optional
+from scoring import FeatureMatrix, feature_blocks
+from feature_store import load_feature_store, interaction_matrix
+from inverted_index import InvertedIndex
+from lookup_index import NameIndex
+from ann_index import ANN_FILE, LSHIndex, load_ann
+from responses import FragmentTable, format_investor_result, format_startup_result, dumps
+from manifest import load_manifest, label_hashes
+from utils import label_table
+
+# ===============================
+# Catalog Snapshot
+# ===============================
+#
+# Everything the engine reads for one version of the catalog. A snapshot is
+# built completely before it is published and is never modified afterwards;
+# a reload builds a new one, so a request that picked up a snapshot can
+# finish on it while newer requests see the next version.
+
+INVESTOR_CACHE_FILE = "preprocessed_investors.json"
+STARTUP_CACHE_FILE = "preprocessed_startups.json"
+INTERACTIONS_FILE = "interactions.json"
+FEATURE_STORE_FILE = "feature_store.npz"
+MANIFEST_FILE = "manifest.json"
+
+class CatalogSnapshot(NamedTuple):
+    version: int
+    loaded_at: float
+    investors: list
+    startups: list
+    interaction_matrix: object  # scipy.sparse.csr_matrix, startup x investor
+    investor_matrix: FeatureMatrix
+    startup_matrix: FeatureMatrix
+    investor_index: InvertedIndex
+    startup_index: InvertedIndex
+    # Approximate indexes from ann_index.npz; None when script.py did not build them
+    investor_ann: Optional[LSHIndex]
+    startup_ann: Optional[LSHIndex]
+    # Pre-serialized result JSON per row, score left out
+    investor_fragments: FragmentTable
+    startup_fragments: FragmentTable
+    # The encoders' label table as served by /dropdowns, and its version
+    labels_version: str
+    dropdowns: bytes
+    # Detail lookups: normalized name -> record, id -> record
+    investor_names: NameIndex
+    startup_names: NameIndex  # values are (startup, investor)
+    investors_by_id: dict
+    startups_by_id: dict
+
+def data_files(data_dir: str) -> list:
+    """Files a snapshot is loaded from; watched for changes by the engine."""
+    names = [FEATURE_STORE_FILE, MANIFEST_FILE, ANN_FILE, INVESTOR_CACHE_FILE, STARTUP_CACHE_FILE, INTERACTIONS_FILE]
+    return [os.path.join(data_dir, name) for name in names]
+
+def load_snapshot(data_dir: str, version: int) -> CatalogSnapshot:
+    # A catalog encoded with other label lists would be scored against the
+    # wrong columns, and /dropdowns would offer labels it was not built with
+    labels = label_table()
+    manifest = load_manifest(data_dir)
+    if manifest is not None and manifest.get("labels", label_hashes()) != label_hashes():
+        raise ValueError("catalog was built from a different labels.json than the running encoders; "
+                         "rebuild it with script.py, or restart to load the new labels")
+
+    store_path = os.path.join(data_dir, FEATURE_STORE_FILE)
+    if os.path.exists(store_path):
+        store = load_feature_store(store_path)
+        investors = store["investors"]
+        startups = store["startups"]
+        interactions = store["interaction_matrix"]
+        investor_blocks = store["investor_blocks"]
+        startup_blocks = store["startup_blocks"]
+    else:
+        # Fall back to the JSON caches when script.py has not written the store yet
+        with open(os.path.join(data_dir, INVESTOR_CACHE_FILE), "r") as f1:
+            investors = json.load(f1)
+        with open(os.path.join(data_dir, STARTUP_CACHE_FILE), "r") as f2:
+            startups = json.load(f2)
+        with open(os.path.join(data_dir, INTERACTIONS_FILE), "r") as f3:
+            interactions = interaction_matrix(startups, json.load(f3), len(investors))
+        investor_blocks = feature_blocks(investors)
+        startup_blocks = feature_blocks(startups)
+        # The bit-packed matrices replace the int lists, as in the store
+        for record in investors + startups + [s for inv in investors for s in inv.get("Invested Startups", [])]:
+            record.get("processed", {}).pop("encoded", None)
+
+    # Queries are encoded against the running label table; data built from
+    # a different labels.json would silently score the wrong columns
+    for blocks in (investor_blocks, startup_blocks):
+        for key, block in blocks.items():
+            width = labels.slices[key].stop - labels.slices[key].start
+            if len(block) and block.shape[1] != width:
+                raise ValueError(f"{key} has {block.shape[1]} columns, expected {width}; "
+                                 "labels.json changed, restart to pick it up")
+
+    investor_matrix = FeatureMatrix(investor_blocks)
+    startup_matrix = FeatureMatrix(startup_blocks)
+    ann = load_ann(os.path.join(data_dir, ANN_FILE), {"investor": investor_matrix, "startup": startup_matrix})
+
+    return CatalogSnapshot(
+        version=version,
+        loaded_at=time.time(),
+        investors=investors,
+        startups=startups,
+        interaction_matrix=interactions,
+        investor_matrix=investor_matrix,
+        startup_matrix=startup_matrix,
+        investor_index=InvertedIndex(investor_matrix),
+        startup_index=InvertedIndex(startup_matrix),
+        investor_ann=ann.get("investor"),
+        startup_ann=ann.get("startup"),
+        investor_fragments=FragmentTable(investors, format_investor_result),
+        startup_fragments=FragmentTable(startups, format_startup_result),
+        labels_version=labels.version,
+        dropdowns=dumps(labels.data),
+        investor_names=NameIndex((inv.get("Name", ""), inv) for inv in investors),
+        startup_names=NameIndex(
+            (s.get("Startup Name", ""), (s, inv))
+            for inv in investors
+            for s in inv.get("Invested Startups", [])
+        ),
+        investors_by_id={inv.get("id"): inv for inv in investors},
+        startups_by_id={s.get("startup_id"): s for s in startups},
+    )
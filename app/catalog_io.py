@@ -0,0 +1,107 @@
+import json
+
+# ===============================
+# Streaming JSON Readers / Writers
+# ===============================
+#
+# script.py handles catalogs far larger than memory should hold at once, so
+# the input array is decoded one element at a time and outputs are written
+# as they are produced. The writers emit exactly what json.dump(..., indent=2)
+# would for the whole list or dict.
+
+def iter_json_array(path, chunk_size=1 << 16):
+    """Yield the elements of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf = f.read(chunk_size)
+        pos = _skip_ws(buf, 0)
+        if pos >= len(buf) or buf[pos] != "[":
+            raise ValueError(f"{path} is not a JSON array")
+        pos += 1
+        eof = False
+
+        while True:
+            pos = _skip_ws(buf, pos)
+            if pos < len(buf) and buf[pos] == ",":
+                pos = _skip_ws(buf, pos + 1)
+            if pos < len(buf) and buf[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                more = f.read(chunk_size)
+                eof = not more
+                buf = buf[pos:] + more
+                pos = 0
+                continue
+            yield item
+            pos = end
+            if pos > chunk_size:
+                buf, pos = buf[pos:], 0
+
+def _skip_ws(buf, pos):
+    while pos < len(buf) and buf[pos] in " \t\r\n":
+        pos += 1
+    return pos
+
+def _indented(text, prefix="  "):
+    return text.replace("\n", "\n" + prefix)
+
+class _IndentedWriter:
+    """
+    Shared base: items are written at indent level 1 and every write returns
+    the (start, end) byte span of its text, so a later build can copy an
+    unchanged run of items verbatim with write_fragment.
+    """
+    OPEN, CLOSE, EMPTY = "", "", ""
+
+    def __init__(self, path):
+        self._f = open(path, "wb")
+        self._count = 0
+        self.offset = 0
+
+    def _put(self, text: bytes):
+        self._f.write(text)
+        self.offset += len(text)
+
+    def write_fragment(self, fragment: bytes):
+        """Write pre-serialized items (as spanned by earlier writes) and return their span."""
+        if not fragment:
+            return None
+        self._put((self.OPEN if not self._count else ",\n  ").encode())
+        start = self.offset
+        self._put(fragment)
+        self._count += 1
+        return start, self.offset
+
+    def close(self):
+        self._put((self.CLOSE if self._count else self.EMPTY).encode())
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class JsonArrayWriter(_IndentedWriter):
+    """Write a JSON array item by item (indent=2 layout)."""
+    OPEN, CLOSE, EMPTY = "[\n  ", "\n]", "[]"
+
+    def write(self, item):
+        return self.write_fragment(_indented(json.dumps(item, indent=2)).encode("utf-8"))
+
+class JsonObjectWriter(_IndentedWriter):
+    """Write a JSON object entry by entry (indent=2 layout)."""
+    OPEN, CLOSE, EMPTY = "{\n  ", "\n}", "{}"
+
+    def write(self, key, value):
+        text = f"{json.dumps(key)}: {_indented(json.dumps(value, indent=2))}"
+        return self.write_fragment(text.encode("utf-8"))
+
+def join_spans(spans):
+    """Span covering consecutive writes, None when there were none."""
+    spans = [s for s in spans if s]
+    return (spans[0][0], spans[-1][1]) if spans else None
@@ -0,0 +1,152 @@
+import json
+import tempfile
+import numpy as np
+from scoring import FEATURE_KEYS, feature_blocks
+
+# ===============================
+# Binary Feature Store
+# ===============================
+#
+# One uncompressed .npz holding everything the engine needs at startup:
+#   investor_<group> / startup_<group>   uint8 feature matrices, one per group
+#   investor_ids / startup_ids           row ids
+#   startup_offsets                      investor i owns startup rows [off[i], off[i+1])
+#   interaction_indptr / _indices        CSR startup x investor interaction matrix
+#   records                              compact JSON of the investor records,
+#                                        without the encoded vectors
+#
+# The pretty-printed JSON caches stay as the human-readable export.
+
+STORE_VERSION = 1
+
+def _strip_encoded(record: dict) -> dict:
+    record = dict(record)
+    processed = dict(record.get("processed", {}))
+    processed.pop("encoded", None)
+    record["processed"] = processed
+    if "Invested Startups" in record:
+        record["Invested Startups"] = [_strip_encoded(s) for s in record["Invested Startups"]]
+    return record
+
+def interaction_matrix(startups: list, interactions: dict, n_investors: int):
+    """Sparse (CSR) startup x investor matrix with a 1 for every recorded investment."""
+    # scipy is only imported once a catalog is built or loaded, not with the engine
+    from scipy.sparse import csr_matrix
+    indptr, indices = [0], []
+    for s in startups:
+        indices.extend(interactions.get(s["startup_id"], []))
+        indptr.append(len(indices))
+    return csr_matrix(
+        (np.ones(len(indices)), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int32)),
+        shape=(len(startups), n_investors),
+    )
+
+class FeatureStoreWriter:
+    """
+    Build a store chunk by chunk so the full catalog never has to be held as
+    Python objects: feature rows are kept as uint8 blocks and the compact
+    record JSON is spooled to a temporary file until close().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._investor_blocks = {k: [] for k in FEATURE_KEYS}
+        self._startup_blocks = {k: [] for k in FEATURE_KEYS}
+        self._investor_ids = []
+        self._startup_ids = []
+        self._portfolio_sizes = []
+        self._indptr = [np.zeros(1, dtype=np.int32)]
+        self._indices = []
+        self._n_indices = 0
+        self._n_investors = 0
+        self._records = tempfile.TemporaryFile()
+        self._records.write(b"[")
+
+    def add(self, investors: list, startups: list, interactions: dict):
+        """Append investors and their startups; interactions covers at least these startups."""
+        for blocks, records in ((self._investor_blocks, investors), (self._startup_blocks, startups)):
+            if records:
+                for key, block in feature_blocks(records).items():
+                    blocks[key].append(block)
+
+        self._investor_ids.append(np.array([inv["id"] for inv in investors], dtype=np.int32))
+        self._startup_ids.append(np.array([s["startup_id"] for s in startups], dtype=str))
+        self._portfolio_sizes.append(
+            np.array([len(inv.get("Invested Startups", [])) for inv in investors], dtype=np.int32)
+        )
+
+        counts = [len(interactions.get(s["startup_id"], [])) for s in startups]
+        self._indices.append(np.array(
+            [i for s in startups for i in interactions.get(s["startup_id"], [])], dtype=np.int32
+        ))
+        self._indptr.append((self._n_indices + np.cumsum(counts)).astype(np.int32))
+        self._n_indices += sum(counts)
+
+        for inv in investors:
+            self._records.write(b"," if self._n_investors else b"")
+            self._records.write(json.dumps(_strip_encoded(inv), separators=(",", ":")).encode("utf-8"))
+            self._n_investors += 1
+
+    def close(self):
+        arrays = {"version": np.array(STORE_VERSION)}
+        for prefix, blocks in (("investor", self._investor_blocks), ("startup", self._startup_blocks)):
+            empty = feature_blocks([])
+            for key in FEATURE_KEYS:
+                arrays[f"{prefix}_{key}"] = np.concatenate(blocks[key]) if blocks[key] else empty[key]
+
+        arrays["investor_ids"] = np.concatenate([np.zeros(0, dtype=np.int32)] + self._investor_ids)
+        arrays["startup_ids"] = np.concatenate([np.zeros(0, dtype=str)] + self._startup_ids)
+        arrays["startup_offsets"] = np.cumsum(
+            np.concatenate([np.zeros(1, dtype=np.int32)] + self._portfolio_sizes)
+        ).astype(np.int32)
+        arrays["interaction_indptr"] = np.concatenate(self._indptr)
+        arrays["interaction_indices"] = np.concatenate([np.zeros(0, dtype=np.int32)] + self._indices)
+
+        # The record JSON is paged in from the spool file rather than copied into memory
+        self._records.write(b"]")
+        self._records.flush()
+        arrays["records"] = np.memmap(self._records, dtype=np.uint8, mode="r")
+
+        try:
+            with open(self.path, "wb") as f:
+                np.savez(f, **arrays)
+        finally:
+            del arrays["records"]
+            self._records.close()
+
+def save_feature_store(path: str, investors: list, startups: list, interactions: dict):
+    writer = FeatureStoreWriter(path)
+    writer.add(investors, startups, interactions)
+    writer.close()
+
+def load_feature_store(path: str) -> dict:
+    """
+    Load a store written by save_feature_store.
+    Returns investors, startups, the interaction matrix and the per-group feature blocks.
+    """
+    from scipy.sparse import csr_matrix
+    with np.load(path, allow_pickle=False) as store:
+        if int(store["version"]) != STORE_VERSION:
+            raise ValueError(f"Unsupported feature store version {int(store['version'])}")
+
+        investors = json.loads(store["records"].tobytes())
+        offsets = store["startup_offsets"]
+        if len(offsets) != len(investors) + 1:
+            raise ValueError("Feature store offsets do not match its records")
+
+        # Startup records are the investors' nested portfolio entries, in row order
+        startups = [s for inv in investors for s in inv.get("Invested Startups", [])]
+
+        indices = store["interaction_indices"]
+        interactions = csr_matrix(
+            (np.ones(len(indices)), indices, store["interaction_indptr"]),
+            shape=(len(startups), len(investors)),
+        )
+
+        return {
+            "investors": investors,
+            "startups": startups,
+            "interaction_matrix": interactions,
+            "investor_blocks": {k: store[f"investor_{k}"] for k in FEATURE_KEYS},
+            "startup_blocks": {k: store[f"startup_{k}"] for k in FEATURE_KEYS},
+        }
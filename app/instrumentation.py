@@ -0,0 +1,101 @@
+import contextvars
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# ===============================
+# Sampled Request Instrumentation
+# ===============================
+#
+# Off by default. With MATCHMAKER_METRICS=1 a sampled fraction of requests
+# (MATCHMAKER_METRICS_SAMPLE, default 1%) records per-stage timings, logs them
+# as one JSON line on the "matchmaker.metrics" logger and adds them to the
+# aggregates returned by metrics_snapshot(). Unsampled requests only pay for
+# a context variable lookup per stage.
+
+logger = logging.getLogger("matchmaker.metrics")
+
+METRICS_ENABLED = os.environ.get("MATCHMAKER_METRICS", "0").lower() in ("1", "true", "yes")
+SAMPLE_RATE = float(os.environ.get("MATCHMAKER_METRICS_SAMPLE", "0.01"))
+
+_NO_OP = nullcontext()
+_current_timer = contextvars.ContextVar("request_timer", default=None)
+
+_stats_lock = threading.Lock()
+_stage_stats = {}  # stage -> {"count", "total_ms", "max_ms"}
+
+class RequestTimer:
+    """Exclusive wall time per stage; nested stages are not double counted."""
+
+    def __init__(self, route: str):
+        self.route = route
+        self.stages = {}
+        self._child_time = [0.0]
+
+    @contextmanager
+    def stage(self, name: str):
+        self._child_time.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._child_time.pop()
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed - children
+            self._child_time[-1] += elapsed
+
+def stage(name: str):
+    """Time a stage of the current sampled request; a no-op otherwise."""
+    timer = _current_timer.get()
+    return timer.stage(name) if timer is not None else _NO_OP
+
+@contextmanager
+def track_request(route: str, **fields):
+    """
+    Sample the request and, if chosen, collect its stage timings.
+    Yields the RequestTimer or None when the request is not sampled.
+    """
+    if not METRICS_ENABLED or random.random() >= SAMPLE_RATE:
+        yield None
+        return
+
+    timer = RequestTimer(route)
+    token = _current_timer.set(timer)
+    start = time.perf_counter()
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+        total_ms = (time.perf_counter() - start) * 1000
+        stages_ms = {k: round(v * 1000, 3) for k, v in timer.stages.items()}
+        _record(stages_ms)
+        logger.info(json.dumps({
+            "route": route,
+            "total_ms": round(total_ms, 3),
+            "stages_ms": stages_ms,
+            **fields,
+        }))
+
+def _record(stages_ms: dict):
+    with _stats_lock:
+        for name, ms in stages_ms.items():
+            entry = _stage_stats.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] += ms
+            entry["max_ms"] = max(entry["max_ms"], ms)
+
+def metrics_snapshot() -> dict:
+    with _stats_lock:
+        stages = {
+            name: {
+                "count": e["count"],
+                "mean_ms": round(e["total_ms"] / e["count"], 3),
+                "max_ms": round(e["max_ms"], 3),
+            }
+            for name, e in _stage_stats.items()
+        }
+    return {"enabled": METRICS_ENABLED, "sample_rate": SAMPLE_RATE, "stages": stages}
@@ -0,0 +1,118 @@
+import numpy as np
+from scoring import FeatureMatrix, query_weights, select_top_k
+from utils import label_table
+
+def indexed_labels() -> dict:
+    """Feature groups with posting lists, in the order their tiers are scanned."""
+    table = label_table()
+    return {"industry_vec": table.industries, "stage_vec": table.stages}
+
+# Slack for float rounding when comparing a score bound against real scores
+BOUND_EPS = 1e-9
+# Queries whose industry/stage tiers hold more than this share of the rows are
+# answered with one full scan. Every row matches the team and year groups at
+# least on "Unknown", so the bound only drops by the industry and stage
+# weights and rarely gets below the k-th score; scoring large tiers first
+# then just adds the cost of splitting the scan.
+MAX_TIER_FRACTION = 0.1
+# Below this many rows a full scan is always cheaper than splitting it
+MIN_INDEXED_ROWS = 5000
+
+class InvertedIndex:
+    """
+    Posting lists from canonical industry/stage labels to the matrix rows
+    carrying them, used to score only rows that can still make the result.
+
+    When the rows sharing an industry or stage with the query are a small
+    share of a large matrix, those are scored first, tier by tier (industry,
+    then stage only). A row outside the tiers scanned so far has zero
+    similarity on those groups, so its score is at most 1 minus their
+    weights; once that bound cannot beat the threshold or the current k-th
+    score, the remaining rows are skipped. Every other query is one full scan.
+    """
+
+    def __init__(self, matrix: FeatureMatrix):
+        self.matrix = matrix
+        self.labels = indexed_labels()
+        self.postings = {}
+        for key, labels in self.labels.items():
+            block = matrix.block(key)
+            self.postings[key] = {
+                label: np.flatnonzero(block[:, col]) for col, label in enumerate(labels)
+            }
+
+    def rows_with(self, key: str, labels: list) -> np.ndarray:
+        """Sorted rows carrying any of the labels in feature group `key`."""
+        lists = [self.postings[key][label] for label in labels if label in self.postings[key]]
+        if not lists:
+            return np.empty(0, dtype=np.intp)
+        return np.unique(np.concatenate(lists))
+
+    def _can_stop(self, bound, scores, k, min_score):
+        if min_score is not None and bound + BOUND_EPS <= min_score:
+            return True
+        if k is None:
+            return False
+        if min_score is not None:
+            scores = scores[scores > min_score]
+        if len(scores) < k:
+            return False
+        kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        return kth > bound + BOUND_EPS
+
+    def search(self, encoded_input: dict, k=None, min_score=None, with_similarities=False, feature_weights=None):
+        """
+        Same rows and scores as a full scan followed by select_top_k (or, with
+        k=None, every row scoring above min_score in row order).
+        Returns (rows, scores), plus the rows' per-group similarities
+        (rows x groups) when with_similarities is set.
+        """
+        query = self.matrix.prepare(encoded_input, feature_weights)
+        weights = query_weights(encoded_input, feature_weights)
+
+        tiers = []
+        for key, labels in self.labels.items() if len(self.matrix) >= MIN_INDEXED_ROWS else ():
+            if key in weights:
+                query_labels = [labels[c] for c in np.flatnonzero(encoded_input[key])]
+                tiers.append((key, [self.postings[key][l] for l in query_labels if l in self.postings[key]]))
+        # Posting lengths bound the tier sizes from above, before any union is taken
+        listed = sum(len(rows) for _, lists in tiers for rows in lists)
+        if 0 < listed <= MAX_TIER_FRACTION * len(self.matrix):
+            found = self._search_tiers(query, weights, tiers, k, min_score)
+            if found is not None:
+                return self._select(*found, k, min_score, with_similarities)
+
+        scores, sims = self.matrix.score_rows(query, return_similarities=True)
+        return self._select(np.arange(len(self.matrix)), scores, sims, k, min_score, with_similarities)
+
+    def _search_tiers(self, query, weights, tiers, k, min_score):
+        """
+        (rows, scores, sims) in row order of the tiers scored before the bound
+        on every other row dropped out of the result, or None if it never did.
+        """
+        seen = np.empty(0, dtype=np.intp)
+        scored = []
+        bound = 1.0
+        for key, lists in tiers:
+            tier = np.setdiff1d(np.unique(np.concatenate(lists)) if lists else seen[:0], seen, assume_unique=True)
+            seen = np.concatenate([seen, tier])
+            scored.append((tier, *self.matrix.score_rows(query, tier, return_similarities=True)))
+            bound -= weights[key]
+            if self._can_stop(bound, np.concatenate([part[1] for part in scored]), k, min_score):
+                rows, scores, sims = (np.concatenate(parts) for parts in zip(*scored))
+                order = np.argsort(rows, kind="stable")
+                return rows[order], scores[order], sims[order]
+        # The tiers are a small share of the rows: rescoring them with the
+        # rest costs less than splitting the full scan around them
+        return None
+
+    @staticmethod
+    def _select(rows, scores, sims, k, min_score, with_similarities):
+        """The requested rows (in row order) of a scan covering rows in row order."""
+        if k is None:
+            keep = scores > min_score if min_score is not None else slice(None)
+        else:
+            keep = select_top_k(scores, k, min_score=min_score)
+        if with_similarities:
+            return rows[keep], scores[keep], sims[keep]
+        return rows[keep], scores[keep]
@@ -0,0 +1,56 @@
+import difflib
+from bisect import bisect_left
+from preprocess import normalize_text
+
+# ===============================
+# Name Lookup Index
+# ===============================
+
+def name_key(name) -> str:
+    """Normalized lookup key: case, accents, dashes and extra spaces ignored."""
+    return normalize_text(name)
+
+class NameIndex:
+    """
+    Hash index from normalized names to values, plus a sorted key list for
+    prefix (autocomplete) and fuzzy lookups. The first value added under a
+    name wins, matching a front-to-back scan of the catalog.
+    """
+
+    def __init__(self, items):
+        self._values = {}
+        self._names = {}
+        for name, value in items:
+            key = name_key(name)
+            if key and key not in self._values:
+                self._values[key] = value
+                self._names[key] = name
+        self._sorted_keys = sorted(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def get(self, name):
+        return self._values.get(name_key(name))
+
+    def prefix(self, query: str, limit: int = 10) -> list:
+        """Display names starting with query, in key order."""
+        key = name_key(query)
+        matches = []
+        i = bisect_left(self._sorted_keys, key)
+        while i < len(self._sorted_keys) and len(matches) < limit:
+            candidate = self._sorted_keys[i]
+            if not candidate.startswith(key):
+                break
+            matches.append(self._names[candidate])
+            i += 1
+        return matches
+
+    def fuzzy(self, query: str, limit: int = 10, cutoff: float = 0.6) -> list:
+        """
+        Closest display names to query, best first. Unlike prefix() this is
+        not an indexed lookup: difflib compares the query with every key,
+        so it costs a linear scan of the names per call.
+        """
+        keys = difflib.get_close_matches(name_key(query), self._sorted_keys, n=limit, cutoff=cutoff)
+        return [self._names[k] for k in keys]
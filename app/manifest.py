@@ -0,0 +1,170 @@
+import os
+import json
+import hashlib
+import numpy as np
+from utils import label_table
+from feature_store import STORE_VERSION, load_feature_store
+
+# ===============================
+# Build Manifest
+# ===============================
+#
+# manifest.json sits next to the outputs and records what they were built
+# from: a content hash of every input investor (in input order) and of every
+# label list that fixes the one-hot column layout, plus where each investor's
+# text sits in the JSON exports. script.py --incremental compares a new input
+# against it: only investors with a new hash are re-encoded, the rest are
+# restored from the previous feature store, and investors unchanged at the
+# same position have their export text copied verbatim instead of re-serialized.
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+def _digest(value) -> str:
+    data = json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+
+def record_hash(raw_investor: dict) -> str:
+    """
+    Hash of a raw investors.json entry, portfolio included. Key order counts,
+    since the exports reproduce it.
+    """
+    return _digest(raw_investor)
+
+def label_hashes() -> dict:
+    """Hash per encoded feature group of the label list the encoders are using."""
+    return {key: _digest(list(labels)) for key, _, labels, _ in label_table().layout}
+
+def load_manifest(data_dir: str):
+    path = os.path.join(data_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(data_dir: str, investor_hashes: list, spans: dict):
+    """spans: export file name -> [(start, end) or None per investor]."""
+    path = os.path.join(data_dir, MANIFEST_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "version": MANIFEST_VERSION,
+            "store_version": STORE_VERSION,
+            "labels": label_hashes(),
+            "investors": investor_hashes,
+            "spans": spans,
+            "sizes": {name: os.path.getsize(os.path.join(data_dir, name)) for name in spans},
+        }, f)
+    os.replace(tmp_path, path)
+
+def discard_manifest(data_dir: str):
+    """Called before outputs are rewritten, so an interrupted build is never reused."""
+    path = os.path.join(data_dir, MANIFEST_FILE)
+    if os.path.exists(path):
+        os.remove(path)
+
+def stale_reason(manifest, store_path: str):
+    """Why the previous build can't be reused, or None if it can."""
+    if manifest is None:
+        return "no manifest from a previous build"
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("store_version") != STORE_VERSION:
+        return "manifest was written by a different pipeline version"
+    if not os.path.exists(store_path):
+        return "no feature store from a previous build"
+    changed = sorted(k for k, h in label_hashes().items() if manifest.get("labels", {}).get(k) != h)
+    if changed:
+        return f"labels.json changed the column layout of {', '.join(changed)}"
+    return None
+
+# ===============================
+# Previous Build
+# ===============================
+
+class PreviousBuild:
+    """
+    Preprocessed investors of the last build, looked up by raw-record hash.
+    Holds the store's compact records and uint8 blocks, plus read handles on
+    the previous JSON exports for copying unchanged text.
+    """
+
+    def __init__(self, manifest: dict, store_path: str):
+        store = load_feature_store(store_path)
+        hashes = manifest["investors"]
+        if len(hashes) != len(store["investors"]):
+            raise ValueError("Manifest does not match the feature store")
+        self._hashes = hashes
+
+        self._investors = store["investors"]
+        self._investor_rows = self._stack(store["investor_blocks"])
+        self._startup_rows = self._stack(store["startup_blocks"])
+        self._offsets = [0]
+        for inv in self._investors:
+            self._offsets.append(self._offsets[-1] + len(inv.get("Invested Startups", [])))
+
+        self._rows = {}
+        for row, h in enumerate(hashes):
+            self._rows.setdefault(h, row)
+
+        # Exports whose size still matches the manifest can serve fragments
+        data_dir = os.path.dirname(store_path)
+        self._spans = {}
+        self._exports = {}
+        for name, spans in manifest.get("spans", {}).items():
+            path = os.path.join(data_dir, name)
+            if os.path.exists(path) and os.path.getsize(path) == manifest["sizes"].get(name):
+                self._spans[name] = spans
+                self._exports[name] = open(path, "rb")
+
+    def __contains__(self, record_hash: str) -> bool:
+        return record_hash in self._rows
+
+    def close(self):
+        for f in self._exports.values():
+            f.close()
+
+    def unchanged_at(self, inv_id, record_hash: str, names) -> bool:
+        """True if inv_id held this exact record last time and its export text can be copied."""
+        return (
+            inv_id < len(self._hashes)
+            and self._hashes[inv_id] == record_hash
+            and all(name in self._exports for name in names)
+        )
+
+    def fragment(self, name: str, inv_id) -> bytes:
+        """The export text written for investor inv_id last time (see catalog_io spans)."""
+        span = self._spans[name][inv_id]
+        if span is None:
+            return b""
+        f = self._exports[name]
+        f.seek(span[0])
+        return f.read(span[1] - span[0])
+
+    def restore(self, inv_id, inv, record_hash: str) -> dict:
+        """
+        Attach the previous preprocessing to an unchanged raw investor, exactly
+        as script.preprocess_investor would, under its new position inv_id.
+        """
+        row = inv_id if self.unchanged_at(inv_id, record_hash, ()) else self._rows[record_hash]
+        old = self._investors[row]
+        inv["processed"] = self._processed(old, self._investor_rows[row])
+        inv["id"] = inv_id
+
+        old_startups = old.get("Invested Startups", [])
+        for s_id, s in enumerate(inv.get("Invested Startups", [])):
+            s_row = self._offsets[row] + s_id
+            s["processed"] = self._processed(old_startups[s_id], self._startup_rows[s_row])
+            s["investor_name"] = inv.get("Name", "Unknown")
+            s["startup_id"] = f"{inv_id}_{s_id}"
+        return inv
+
+    @staticmethod
+    def _stack(blocks):
+        # One full-width row per record, so restoring a record is a single row read
+        return np.hstack([blocks[key] for key, _, _, _ in label_table().layout])
+
+    @staticmethod
+    def _processed(record, row) -> dict:
+        processed = dict(record["processed"])
+        table = label_table()
+        processed["encoded"] = {key: row[table.slices[key]].tolist() for key, _, _, _ in table.layout}
+        return processed
@@ -0,0 +1,79 @@
+import base64
+import json
+import threading
+from typing import NamedTuple, Optional
+import numpy as np
+from scoring import select_top_k
+
+# ===============================
+# Ranked Lists
+# ===============================
+#
+# The first page of a paginated request ranks the query once and caches the
+# best MAX_RANKED rows with their scores. Pages are cut from that list: each
+# one only orders the rows it needs, with a partial selection over the rows
+# no earlier page has ranked yet.
+
+# Deepest result a cursor can page to
+MAX_RANKED = 1000
+MAX_PAGE_SIZE = 50
+
+class Page(NamedTuple):
+    results: list
+    next_offset: Optional[int]  # None after the last page
+    version: int                # catalog snapshot the page was ranked on
+
+class RankedList:
+    """Compact rows/scores of one query's results, ranked as far as pages have asked."""
+
+    def __init__(self, rows: np.ndarray, scores: np.ndarray):
+        # Unranked rows stay in catalog order, so ties keep catalog order too
+        order = np.argsort(rows, kind="stable")
+        self.rows = np.asarray(rows, dtype=np.int32)[order]
+        self.scores = np.asarray(scores, dtype=np.float64)[order]
+        self._ranked = 0  # leading entries already in final order
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def page(self, offset: int, size: int):
+        """(rows, scores) of results offset .. offset + size, best first."""
+        stop = min(offset + size, len(self.rows))
+        with self._lock:
+            if stop > self._ranked:
+                rows, scores = self.rows[self._ranked:], self.scores[self._ranked:]
+                top = select_top_k(scores, stop - self._ranked)
+                rest = np.ones(len(rows), dtype=bool)
+                rest[top] = False
+                self.rows[self._ranked:] = np.concatenate([rows[top], rows[rest]])
+                self.scores[self._ranked:] = np.concatenate([scores[top], scores[rest]])
+                self._ranked = stop
+        return self.rows[offset:stop].copy(), self.scores[offset:stop].copy()
+
+# ===============================
+# Cursors
+# ===============================
+#
+# A cursor carries the request it continues (catalog version, payload and
+# offset) rather than pointing at server state: any worker can serve the
+# next page, from its cached ranking or by ranking the payload again.
+
+class CursorExpired(Exception):
+    """The catalog was reloaded since the cursor was issued."""
+
+def encode_cursor(version: int, payload: dict, offset: int) -> str:
+    state = json.dumps({"v": version, "o": offset, "p": payload}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(state.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> dict:
+    """{"version", "offset", "payload"} of a cursor; ValueError if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        version, offset, payload = int(state["v"]), int(state["o"]), state["p"]
+    except (ValueError, TypeError, KeyError, UnicodeError) as e:
+        raise ValueError("Malformed cursor") from e
+    if not isinstance(payload, dict) or not 0 <= offset < MAX_RANKED:
+        raise ValueError("Malformed cursor")
+    return {"version": version, "offset": offset, "payload": payload}
@@ -1,5 +1,6 @@
 import re
 import unicodedata
+from functools import lru_cache
 
 # ===============================
 # Canonical Mappings
@@ -112,19 +113,32 @@ STAGE_ALIASES = {
 # Normalization Utilities
 # ===============================
 
+# Catalogs and request traffic reuse a small set of distinct strings, so the
+# normalizers below are memoized (bounded) and their patterns precompiled.
+MEMO_SIZE = 4096
+
+SEPARATOR_PATTERN = re.compile(r"[\s\-_/]+")
+NUMBER_PATTERN = re.compile(r"\d+")
+
 def normalize_text(text):
     if not isinstance(text, str):
         return ""
+    return _normalize_text(text)
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _normalize_text(text):
     text = unicodedata.normalize("NFKD", text)
     text = text.lower()
-    text = re.sub(r"[\s\-_/]+", " ", text)  # normalize whitespace, dashes, underscores
+    text = SEPARATOR_PATTERN.sub(" ", text)  # normalize whitespace, dashes, underscores
     text = text.strip()
     return text
 
+@lru_cache(maxsize=MEMO_SIZE)
 def canonicalize_industry(industry):
     key = normalize_text(industry)
     return INDUSTRY_ALIASES.get(key, industry.strip())
 
+@lru_cache(maxsize=MEMO_SIZE)
 def canonicalize_stage(stage):
     key = normalize_text(stage)
     return STAGE_ALIASES.get(key, stage.strip())
@@ -143,6 +157,13 @@ def canonicalize_location(location):
 # ===============================
 
 def bucket_team_size(size):
+    try:
+        return _bucket_team_size(size)
+    except TypeError:  # unhashable input, skip the memo
+        return _bucket_team_size.__wrapped__(size)
+
+@lru_cache(maxsize=MEMO_SIZE, typed=True)
+def _bucket_team_size(size):
     if not size:
         return "Unknown"
 
@@ -152,14 +173,14 @@ def bucket_team_size(size):
     # Handle ranges like "10-50"
     if "-" in size_str:
         try:
-            parts = re.findall(r'\d+', size_str)
+            parts = NUMBER_PATTERN.findall(size_str)
             avg = (int(parts[0]) + int(parts[1])) // 2
         except:
             return "Unknown"
     # Handle "100+", ">100", "over 50"
     elif "+" in size_str or ">" in size_str or "above" in size_str:
         try:
-            number = int(re.findall(r'\d+', size_str)[0])
+            number = int(NUMBER_PATTERN.findall(size_str)[0])
             avg = number + 10
         except:
             return "Unknown"
@@ -168,7 +189,7 @@ def bucket_team_size(size):
         avg = 5
     else:
         try:
-            avg = int(re.findall(r'\d+', size_str)[0])
+            avg = int(NUMBER_PATTERN.findall(size_str)[0])
         except:
             return "Unknown"
 
@@ -0,0 +1,71 @@
+import logging
+from recommender_engine import get_recommendations, get_recommendation_page
+from schemas import validate_recommend_request
+from pagination import encode_cursor, decode_cursor, CursorExpired
+from instrumentation import stage
+from responses import dumps
+
+# ===============================
+# Recommend Handlers
+# ===============================
+#
+# /recommend and /recommend/page as (status, body) from the parsed request,
+# shared by the Flask routes (api.py) and the ASGI app (asgi.py). Each entry
+# point only reads the request, times it and sends the body.
+
+logger = logging.getLogger(__name__)
+
+def error_body(message: str, **fields) -> bytes:
+    return dumps({"error": message, **fields})
+
+def recommend(json_data, explain: bool = False) -> tuple:
+    """A /recommend payload ranked, or a page of it when it has a pageSize."""
+    if not json_data:
+        return 400, error_body("Empty request")
+
+    validated_data, errors = validate_recommend_request(json_data)
+    if errors:
+        return 400, error_body("Invalid payload", details=errors)
+    if explain:
+        validated_data["explain"] = True
+
+    if validated_data.get("pageSize"):
+        # The cursor replays this payload, including a ?explain=true
+        payload = dict(json_data, explain=validated_data["explain"])
+        return recommendation_page(validated_data, payload, 0)
+
+    try:
+        results = get_recommendations(validated_data, as_json=True)
+    except Exception as e:
+        logger.exception("Recommendation failed")
+        return 500, error_body("Internal server error", message=str(e))
+
+    with stage("serialize"):
+        return 200, b'{"recommendations":' + results + b"}"
+
+def recommend_page(cursor_text: str) -> tuple:
+    """Next page of a paginated /recommend, from the next_cursor of the previous one."""
+    try:
+        cursor = decode_cursor(cursor_text)
+    except ValueError:
+        return 400, error_body("Invalid cursor")
+
+    validated_data, errors = validate_recommend_request(cursor["payload"])
+    if errors or not validated_data.get("pageSize"):
+        return 400, error_body("Invalid cursor")
+    return recommendation_page(validated_data, cursor["payload"], cursor["offset"], cursor["version"])
+
+def recommendation_page(validated_data, payload, offset, version=None) -> tuple:
+    try:
+        page = get_recommendation_page(validated_data, validated_data["pageSize"], offset, version, as_json=True)
+    except CursorExpired:
+        return 410, error_body("Cursor expired: the catalog was reloaded, request the first page again")
+    except Exception as e:
+        logger.exception("Recommendation failed")
+        return 500, error_body("Internal server error", message=str(e))
+
+    next_cursor = None
+    if page.next_offset is not None:
+        next_cursor = encode_cursor(page.version, payload, page.next_offset)
+    with stage("serialize"):
+        return 200, b'{"recommendations":' + page.results + b',"next_cursor":' + dumps(next_cursor) + b"}"
@@ -1,171 +1,579 @@
-import json
+import logging
 import os
+import threading
+import time
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from utils import full_preprocess
-import logging
+from scoring import select_top_k, top_k_rows, explain_similarities, blend_hybrid, weighted_sum
+from catalog import load_snapshot, data_files
+from result_cache import ResultCache, query_key, weights_key
+from pagination import Page, RankedList, CursorExpired, MAX_RANKED
+from responses import Ranking, EMPTY_RANKING
+from sharding import shard_pool
+from instrumentation import stage
+
+logger = logging.getLogger(__name__)
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_DIR = os.path.join(BASE_DIR, "data")
-
-INVESTOR_CACHE_FILE = os.path.join(DATA_DIR, "preprocessed_investors.json")
-STARTUP_CACHE_FILE = os.path.join(DATA_DIR, "preprocessed_startups.json")
-INTERACTIONS_FILE = os.path.join(DATA_DIR, "interactions.json")
-
-INVESTORS = []
-STARTUPS = []
-INTERACTIONS = {}
-
-def load_data():
-    global INVESTORS, STARTUPS, INTERACTIONS
-    with open(INVESTOR_CACHE_FILE, "r") as f1:
-        INVESTORS = json.load(f1)
-    with open(STARTUP_CACHE_FILE, "r") as f2:
-        STARTUPS = json.load(f2)
-    with open(INTERACTIONS_FILE, "r") as f3:
-        INTERACTIONS = json.load(f3)
-
-load_data()
-
-def compute_similarity(vec1, vec2):
-    if not vec1 or not vec2 or not any(vec1) or not any(vec2):
-        return 0.0
-    try:
-        return float(cosine_similarity([vec1], [vec2])[0][0])
-    except Exception as e:
-        logging.warning(f"Similarity error: {e}")
-        return 0.0
+DATA_DIR = os.environ.get("MATCHMAKER_DATA_DIR", os.path.join(BASE_DIR, "data"))
+
+# ===============================
+# Published Catalog Snapshot
+# ===============================
+#
+# _SNAPSHOT is the only reference to the live catalog. Readers take it once
+# per request (current_snapshot()) and use that object throughout, so a
+# reload swapping in a new snapshot never changes data under a running
+# request. Results are cached per snapshot version.
+#
+# Nothing is loaded at import: the first current_snapshot() loads the
+# catalog, unless startup.initialize() already has.
+
+_SNAPSHOT = None
+_init_lock = threading.Lock()
+_reload_lock = threading.Lock()
+_reload_state = {"reloading": False, "last_error": None}
+# Guards _reload_state["reloading"] only; _reload_lock is held for a whole load
+_reload_state_lock = threading.Lock()
+
+RESULT_CACHE = ResultCache(maxsize=1024, ttl=300.0)
+# Rankings behind paginated requests (see get_recommendation_page)
+RANKED_CACHE = ResultCache(maxsize=256, ttl=300.0)
 
-def format_investor_result(score, inv):
+def current_snapshot():
+    snapshot = _SNAPSHOT
+    if snapshot is None:
+        with _init_lock:
+            # Concurrent first requests wait for one load instead of each starting their own
+            snapshot = _SNAPSHOT or load_data()
+    return snapshot
+
+def catalog_loaded() -> bool:
+    """Whether current_snapshot() returns without loading the catalog."""
+    return _SNAPSHOT is not None
+
+def load_data(data_dir=None):
+    """Build a new snapshot from data_dir and publish it. Returns the snapshot."""
+    global _SNAPSHOT
+    with _reload_lock:
+        version = _SNAPSHOT.version + 1 if _SNAPSHOT is not None else 1
+        snapshot = load_snapshot(data_dir or DATA_DIR, version)
+        _SNAPSHOT = snapshot
+    # Entries of older versions can never be hit again
+    RESULT_CACHE.clear()
+    RANKED_CACHE.clear()
+    return snapshot
+
+def reload_in_background(data_dir=None) -> bool:
+    """
+    Start loading a new snapshot on a background thread; requests keep being
+    served from the current one until it is swapped in. False if a reload is
+    already running.
+    """
+    with _reload_state_lock:
+        if _reload_state["reloading"]:
+            return False
+        _reload_state["reloading"] = True
+
+    def run():
+        try:
+            snapshot = load_data(data_dir)
+            _reload_state["last_error"] = None
+            logger.info("Catalog reloaded: version %d, %d investors", snapshot.version, len(snapshot.investors))
+        except Exception as e:
+            _reload_state["last_error"] = str(e)
+            current = _SNAPSHOT
+            if current is None:
+                logger.exception("Catalog load failed; no catalog loaded yet")
+            else:
+                logger.exception("Catalog reload failed; still serving version %d", current.version)
+        finally:
+            with _reload_state_lock:
+                _reload_state["reloading"] = False
+
+    threading.Thread(target=run, name="catalog-reload", daemon=True).start()
+    return True
+
+def reload_status() -> dict:
+    snapshot = current_snapshot()
     return {
-        "id": inv.get("id"),
-        "Investor Name": inv.get("Name", "N/A"),
-        "Location": inv.get("Location", "N/A"),
-        "Score": round(score, 3),
-        "Investor Bio": inv.get("Investor Bio", "—"),
-        "Past Investment Types": inv.get("Past Investment Types", "—"),
-        "Investment Stages": inv.get("Investment Stages", "—")
+        "version": snapshot.version,
+        "loaded_at": snapshot.loaded_at,
+        "investors": len(snapshot.investors),
+        "startups": len(snapshot.startups),
+        **_reload_state,
     }
 
-def calculate_similarity_score(encoded_input, encoded_target, log_prefix=""):
-    base_weights = {
-        "industry_vec": 0.35,
-        "stage_vec": 0.15,
-        "location_vec": 0.1,
-        "team_vec": 0.05,
-        "year_vec": 0.05,
-        "business_model_vec": 0.1,
-        "revenue_stage_vec": 0.1,
-        "customer_segment_vec": 0.1
-    }
+def watch_data_files(interval: float, data_dir=None):
+    """
+    Poll the catalog files every interval seconds and reload in the background
+    once they have changed and then stayed unchanged for a full interval
+    (script.py swaps its outputs in one after another).
+    """
+    paths = data_files(data_dir or DATA_DIR)
 
-    # Normalize weights based on presence of input values
-    active_keys = [k for k in base_weights if any(encoded_input.get(k, []))]
-    total_weight = sum(base_weights[k] for k in active_keys)
+    def signature():
+        return tuple((os.stat(p).st_mtime_ns, os.stat(p).st_size) if os.path.exists(p) else None for p in paths)
 
-    score = 0.0
-    if log_prefix:
-        print(f"\n🔍 {log_prefix} — Feature Contributions (normalized):")
+    def run():
+        loaded = pending = signature()
+        while True:
+            time.sleep(interval)
+            current = signature()
+            if current != loaded and current == pending:
+                if reload_in_background(data_dir):
+                    loaded = current
+            pending = current
 
-    for key in base_weights:
-        if not any(encoded_input.get(key, [])):
-            continue  # skip missing or zero-vector features
+    threading.Thread(target=run, name="catalog-watch", daemon=True).start()
 
-        weight = base_weights[key] / total_weight
-        sim = compute_similarity(encoded_input.get(key, []), encoded_target.get(key, []))
-        contribution = weight * sim
-        score += contribution
+def cache_stats():
+    return RESULT_CACHE.stats()
 
-        if log_prefix:
-            print(f"  {key.ljust(24)} → sim: {sim:.3f} × norm_weight: {weight:.3f} = {contribution:.3f}")
+def find_investor(name):
+    """Investor record by name (case and spacing insensitive), or None."""
+    return current_snapshot().investor_names.get(name)
 
-    if log_prefix:
-        print(f"  {'TOTAL'.ljust(24)} → final score: {score:.3f}\n")
+def find_startup(name):
+    """(startup, investor) for the first portfolio entry with this name, or None."""
+    return current_snapshot().startup_names.get(name)
 
-    return score
+def autocomplete(query, kind="investor", limit=10, fuzzy=False):
+    """Investor or startup names starting with query; closest names instead when fuzzy."""
+    snapshot = current_snapshot()
+    index = snapshot.startup_names if kind == "startup" else snapshot.investor_names
+    return index.fuzzy(query, limit) if fuzzy else index.prefix(query, limit)
 
+def _explanations(encoded_input, keys, sims, feature_weights=None):
+    return [explain_similarities(encoded_input, dict(zip(keys, row_sims)), feature_weights) for row_sims in sims]
 
+def _index(exact_index, ann_index, approx):
+    """The LSH index when approx search was asked for and one was built, else the exact index."""
+    return ann_index if approx and ann_index is not None else exact_index
 
-def recommend_by_content(encoded_input, top_k=10):
-    scores = []
-    for inv in INVESTORS:
-        inv_vecs = inv["processed"]["encoded"]
-        score = calculate_similarity_score(encoded_input, inv_vecs)
-        if score > 0.1:
-            scores.append((score, inv))
+def _output(ranking, snapshot, as_json):
+    return ranking.json(snapshot) if as_json else ranking.results(snapshot)
 
-    sorted_results = sorted(scores, key=lambda x: x[0], reverse=True)
+def _row_similarities(matrix, encoded_input, rows, feature_weights=None):
+    return matrix.score_rows(matrix.prepare(encoded_input, feature_weights), rows, return_similarities=True)[1]
 
-    # 🔍 Show per-feature breakdown for top results
-    for score, inv in sorted_results[:top_k]:
-        calculate_similarity_score(encoded_input, inv["processed"]["encoded"], log_prefix=f"Investor {inv.get('id')} - {inv.get('Name', 'N/A')}")
+def _sharded(snapshot, scanned_rows, run):
+    """
+    run(pool) -> (rows, scores) on this process's shard pool when the scan
+    is large enough to shard (see sharding.py); None to score in-process.
+    """
+    pool = shard_pool(snapshot, scanned_rows)
+    if pool is None:
+        return None
+    try:
+        return run(pool)
+    except Exception:
+        logger.exception("Sharded scoring failed; scoring in-process")
+        return None
+
+def rank_by_content(encoded_input, top_k=10, explain=False, snapshot=None, approx=False, feature_weights=None) -> Ranking:
+    snapshot = snapshot or current_snapshot()
+    matrix = snapshot.investor_matrix
+    found = None if approx else _sharded(snapshot, len(matrix), lambda pool: pool.top_k(
+        "investor", matrix.prepare(encoded_input, feature_weights), top_k, 0.1
+    ))
+    if found is not None:
+        rows, scores = found
+        sims = _row_similarities(matrix, encoded_input, rows, feature_weights) if explain else None
+    else:
+        index = _index(snapshot.investor_index, snapshot.investor_ann, approx)
+        # Per-feature breakdown straight from the scoring pass
+        rows, scores, sims = index.search(encoded_input, k=top_k, min_score=0.1, with_similarities=True,
+                                          feature_weights=feature_weights)
+    explanations = _explanations(encoded_input, matrix.keys, sims, feature_weights) if explain else None
+    return Ranking("investor", rows, scores, explanations)
+
+def recommend_by_content(encoded_input, top_k=10, explain=False, snapshot=None, approx=False, feature_weights=None):
+    snapshot = snapshot or current_snapshot()
+    with stage("score"):
+        ranking = rank_by_content(encoded_input, top_k, explain, snapshot, approx, feature_weights)
+    with stage("rank"):
+        return ranking.results(snapshot)
+
+def collaborative_scores(encoded_input, snapshot, feature_weights=None):
+    """Per investor: summed similarity (> 0.1) of the startups they backed."""
+    # Every startup's score is needed, so one full pass beats the pruned index search
+    return _backed_scores(snapshot, snapshot.startup_matrix.score(encoded_input, feature_weights))
 
-    return [format_investor_result(score, inv) for score, inv in sorted_results[:top_k]]
+def _backed_scores(snapshot, startup_sims):
+    return snapshot.interaction_matrix.T @ np.where(startup_sims > 0.1, startup_sims, 0.0)
 
+def rank_by_collaborative(encoded_input, top_k=10, snapshot=None, feature_weights=None) -> Ranking:
+    snapshot = snapshot or current_snapshot()
+    found = _sharded(snapshot, len(snapshot.startups), lambda pool: pool.collaborative_top_k(
+        snapshot.startup_matrix.prepare(encoded_input, feature_weights), top_k
+    ))
+    if found is not None:
+        return Ranking("investor", *found)
+    return collaborative_ranking(collaborative_scores(encoded_input, snapshot, feature_weights), top_k)
 
-def recommend_by_collaborative(encoded_input, top_k=10):
-    score_map = {}
-    for startup in STARTUPS:
-        s_vecs = startup["processed"]["encoded"]
-        sim = calculate_similarity_score(encoded_input, s_vecs)
-        if sim > 0.1:
-            startup_id = startup.get("startup_id")
-            for inv_id in INTERACTIONS.get(startup_id, []):
-                score_map[inv_id] = score_map.get(inv_id, 0) + sim
-    sorted_results = sorted([(score, INVESTORS[inv_id]) for inv_id, score in score_map.items()], key=lambda x: x[0], reverse=True)
-    return [format_investor_result(score, inv) for score, inv in sorted_results[:top_k]]
+def recommend_by_collaborative(encoded_input, top_k=10, snapshot=None, feature_weights=None):
+    snapshot = snapshot or current_snapshot()
+    with stage("score"):
+        ranking = rank_by_collaborative(encoded_input, top_k, snapshot, feature_weights)
+    with stage("rank"):
+        return ranking.results(snapshot)
 
-def recommend_by_hybrid(encoded_input, activity_weight=0.5, investment_weight=0.5, top_k=10):
-    content_scores = recommend_by_content(encoded_input, top_k=top_k * 2)
-    collaborative_scores = recommend_by_collaborative(encoded_input, top_k=top_k * 2)
+def collaborative_ranking(investor_scores, top_k) -> Ranking:
+    """Top investors by the summed scores of the similar startups they backed."""
+    top_rows = select_top_k(investor_scores, top_k, min_score=0.0)
+    return Ranking("investor", top_rows, investor_scores[top_rows])
 
-    content_dict = {c["id"]: c for c in content_scores}
-    hybrid_results = []
+def rank_by_hybrid(encoded_input, activity_weight=0.5, investment_weight=0.5, top_k=10, snapshot=None,
+                   feature_weights=None) -> Ranking:
+    """
+    Blend of content and collaborative scores for every investor, ranked
+    exactly. Each part counts as in its own mode: content similarities above
+    0.1, collaborative sums over startups above 0.1.
+    """
+    snapshot = snapshot or current_snapshot()
+    found = _sharded(snapshot, len(snapshot.investors) + len(snapshot.startups), lambda pool: pool.collaborative_top_k(
+        snapshot.startup_matrix.prepare(encoded_input, feature_weights), top_k,
+        snapshot.investor_matrix.prepare(encoded_input, feature_weights), (activity_weight, investment_weight)
+    ))
+    if found is not None:
+        return Ranking("investor", *found)
+    content = snapshot.investor_matrix.score(encoded_input, feature_weights)
+    scores = blend_hybrid(
+        np.where(content > 0.1, content, 0.0),
+        collaborative_scores(encoded_input, snapshot, feature_weights),
+        activity_weight,
+        investment_weight
+    )
+    return hybrid_ranking(scores, top_k)
 
-    for collab in collaborative_scores:
-        inv_id = collab["id"]
-        content_score = content_dict.get(inv_id, {}).get("Score", 0)
-        hybrid_score = activity_weight * content_score + investment_weight * collab["Score"]
-        collab["Score"] = round(hybrid_score, 3)
-        hybrid_results.append(collab)
+def recommend_by_hybrid(encoded_input, activity_weight=0.5, investment_weight=0.5, top_k=10, snapshot=None,
+                        feature_weights=None):
+    snapshot = snapshot or current_snapshot()
+    with stage("score"):
+        ranking = rank_by_hybrid(encoded_input, activity_weight, investment_weight, top_k, snapshot, feature_weights)
+    with stage("rank"):
+        return ranking.results(snapshot)
 
-    return sorted(hybrid_results, key=lambda x: x["Score"], reverse=True)[:top_k]
+def hybrid_ranking(scores, top_k) -> Ranking:
+    top_rows = select_top_k(scores, top_k, min_score=0.0)
+    return Ranking("investor", top_rows, scores[top_rows])
 
-def recommend_similar_startups(input_data, top_k=10):
+def rank_similar_startups(input_data, top_k=10, explain=False, snapshot=None, approx=False,
+                          feature_weights=None) -> Ranking:
+    snapshot = snapshot or current_snapshot()
     encoded_input = input_data["encoded"]
-    scores = []
-    for s in STARTUPS:
-        s_vecs = s["processed"]["encoded"]
-        score = calculate_similarity_score(encoded_input, s_vecs)
-        scores.append((score, s))
-    sorted_results = sorted(scores, key=lambda x: x[0], reverse=True)
-    return [
-        {
-            "Startup Name": s.get("Startup Name", "N/A"),
-            "Industry": s.get("Industry", "—"),
-            "Location": s.get("Location", "—"),
-            "Funding Stage": s.get("Funding Stage", "—"),
-            "Score": round(score, 3),
-            "Investor": s.get("investor_name", "—")
-        }
-        for score, s in sorted_results[:top_k]
-    ]
-
-def get_recommendations(data: dict, top_k: int = 6):
+    matrix = snapshot.startup_matrix
+    found = None if approx else _sharded(snapshot, len(matrix), lambda pool: pool.top_k(
+        "startup", matrix.prepare(encoded_input, feature_weights), top_k
+    ))
+    if found is not None:
+        rows, scores = found
+        sims = _row_similarities(matrix, encoded_input, rows, feature_weights) if explain else None
+    else:
+        index = _index(snapshot.startup_index, snapshot.startup_ann, approx)
+        rows, scores, sims = index.search(encoded_input, k=top_k, with_similarities=True,
+                                          feature_weights=feature_weights)
+    explanations = _explanations(encoded_input, matrix.keys, sims, feature_weights) if explain else None
+    return Ranking("startup", rows, scores, explanations)
+
+def recommend_similar_startups(input_data, top_k=10, explain=False, snapshot=None, approx=False, feature_weights=None):
+    snapshot = snapshot or current_snapshot()
+    with stage("score"):
+        ranking = rank_similar_startups(input_data, top_k, explain, snapshot, approx, feature_weights)
+    with stage("rank"):
+        return ranking.results(snapshot)
+
+def get_recommendations(data: dict, top_k: int = 6, as_json: bool = False):
+    """
+    Recommendations for one validated payload, answered from RESULT_CACHE
+    when the same encoded query was ranked recently against the same
+    catalog snapshot. Returns a list of result dicts, or with as_json the
+    same results as a JSON array (bytes) spliced from the snapshot's
+    pre-serialized fragments.
+    With data["explain"], content and startup_similarity results carry a
+    per-feature "Explanation"; with data["search"] == "approx" they are
+    ranked from the LSH index when the snapshot has one. data["featureWeights"]
+    overrides the base weight of any feature group.
+    """
     rs_type = data.get("rs_type", "content")
     encoded_input = data["processed"]["encoded"]
+    explain = bool(data.get("explain", False))
+    approx = data.get("search", "exact") == "approx"
+    snapshot = current_snapshot()
+
+    key = (snapshot.version, rs_type, top_k, explain, approx, query_key(encoded_input),
+           weights_key(data.get("featureWeights")))
+    if rs_type == "hybrid":
+        key += (data.get("activityWeight", 0.5), data.get("investmentWeight", 0.5))
 
+    ranking = RESULT_CACHE.get(key)
+    if ranking is None:
+        with stage("score"):
+            ranking = _compute_ranking(data, rs_type, encoded_input, top_k, explain, snapshot, approx)
+        RESULT_CACHE.put(key, ranking)
+    with stage("rank"):
+        return _output(ranking, snapshot, as_json)
+
+def warm_up(items: list):
+    """
+    Rank and serialize each validated payload once, outside the result
+    cache, so one-time costs (first NumPy calls, first reads of the matrices
+    and fragments) are paid before the first request.
+    """
+    snapshot = current_snapshot()
+    for data in items:
+        rs_type = data.get("rs_type", "content")
+        ranking = _compute_ranking(data, rs_type, data["processed"]["encoded"], 6, bool(data.get("explain")), snapshot)
+        _output(ranking, snapshot, True)
+
+def _compute_ranking(data, rs_type, encoded_input, top_k, explain, snapshot, approx=False):
+    feature_weights = data.get("featureWeights")
     if rs_type == "content":
-        return recommend_by_content(encoded_input, top_k)
+        return rank_by_content(encoded_input, top_k, explain, snapshot, approx, feature_weights)
     elif rs_type == "collaborative":
-        return recommend_by_collaborative(encoded_input, top_k)
+        return rank_by_collaborative(encoded_input, top_k, snapshot, feature_weights)
     elif rs_type == "hybrid":
-        return recommend_by_hybrid(
+        return rank_by_hybrid(
             encoded_input,
             data.get("activityWeight", 0.5),
             data.get("investmentWeight", 0.5),
-            top_k
+            top_k,
+            snapshot,
+            feature_weights
         )
     elif rs_type == "startup_similarity":
-        return recommend_similar_startups(data["processed"], top_k)
-    return []
+        return rank_similar_startups(data["processed"], top_k, explain, snapshot, approx, feature_weights)
+    return EMPTY_RANKING
+
+# ===============================
+# Paginated Recommendations
+# ===============================
+
+def get_recommendation_page(data: dict, page_size: int, offset: int = 0, version=None, as_json: bool = False):
+    """
+    One page of the ranking for a validated payload: the results
+    get_recommendations(data, top_k=offset + page_size) would end with.
+    The ranking is computed once per query and cached; version, when given,
+    must still be the live catalog's or CursorExpired is raised.
+    """
+    rs_type = data.get("rs_type", "content")
+    encoded_input = data["processed"]["encoded"]
+    approx = data.get("search", "exact") == "approx"
+    snapshot = current_snapshot()
+    if version is not None and version != snapshot.version:
+        raise CursorExpired(f"catalog version {version} was replaced by {snapshot.version}")
+
+    key = (snapshot.version, rs_type, approx, query_key(encoded_input), weights_key(data.get("featureWeights")))
+    if rs_type == "hybrid":
+        key += (data.get("activityWeight", 0.5), data.get("investmentWeight", 0.5))
+
+    ranked = RANKED_CACHE.get(key)
+    if ranked is None:
+        with stage("score"):
+            ranked = _rank(data, rs_type, encoded_input, snapshot, approx)
+        RANKED_CACHE.put(key, ranked)
+
+    with stage("rank"):
+        rows, scores = ranked.page(offset, page_size)
+        ranking = _page_ranking(data, rs_type, encoded_input, rows, scores, snapshot)
+        results = _output(ranking, snapshot, as_json)
+    next_offset = offset + len(rows)
+    return Page(results, next_offset if next_offset < len(ranked) else None, snapshot.version)
+
+def _rank(data, rs_type, encoded_input, snapshot, approx) -> RankedList:
+    """The best MAX_RANKED results of a query, over the same rows and thresholds as its mode."""
+    found = None if approx else _sharded_rank(data, rs_type, encoded_input, snapshot)
+    if found is not None:
+        return RankedList(*found)
+
+    feature_weights = data.get("featureWeights")
+    if rs_type in ("content", "startup_similarity"):
+        investors = rs_type == "content"
+        min_score = 0.1 if investors else None
+        ann = snapshot.investor_ann if investors else snapshot.startup_ann
+        if approx and ann is not None:
+            rows, scores = ann.search(encoded_input, min_score=min_score, feature_weights=feature_weights)
+        else:
+            matrix = snapshot.investor_matrix if investors else snapshot.startup_matrix
+            all_scores = matrix.score(encoded_input, feature_weights)
+            rows = np.arange(len(all_scores)) if min_score is None else np.flatnonzero(all_scores > min_score)
+            scores = all_scores[rows]
+    elif rs_type == "collaborative":
+        all_scores = collaborative_scores(encoded_input, snapshot, feature_weights)
+        rows = np.flatnonzero(all_scores > 0.0)
+        scores = all_scores[rows]
+    elif rs_type == "hybrid":
+        content = snapshot.investor_matrix.score(encoded_input, feature_weights)
+        all_scores = blend_hybrid(
+            np.where(content > 0.1, content, 0.0),
+            collaborative_scores(encoded_input, snapshot, feature_weights),
+            data.get("activityWeight", 0.5),
+            data.get("investmentWeight", 0.5)
+        )
+        rows = np.flatnonzero(all_scores > 0.0)
+        scores = all_scores[rows]
+    else:
+        rows, scores = np.empty(0, dtype=np.intp), np.empty(0)
+
+    keep = top_k_rows(scores, MAX_RANKED)
+    return RankedList(rows[keep], scores[keep])
+
+def _sharded_rank(data, rs_type, encoded_input, snapshot):
+    feature_weights = data.get("featureWeights")
+    if rs_type in ("content", "startup_similarity"):
+        kind = "investor" if rs_type == "content" else "startup"
+        matrix = snapshot.investor_matrix if kind == "investor" else snapshot.startup_matrix
+        return _sharded(snapshot, len(matrix), lambda pool: pool.top_k(
+            kind, matrix.prepare(encoded_input, feature_weights), MAX_RANKED, 0.1 if kind == "investor" else None
+        ))
+    if rs_type == "collaborative":
+        return _sharded(snapshot, len(snapshot.startups), lambda pool: pool.collaborative_top_k(
+            snapshot.startup_matrix.prepare(encoded_input, feature_weights), MAX_RANKED
+        ))
+    if rs_type == "hybrid":
+        weights = (data.get("activityWeight", 0.5), data.get("investmentWeight", 0.5))
+        return _sharded(snapshot, len(snapshot.investors) + len(snapshot.startups), lambda pool: pool.collaborative_top_k(
+            snapshot.startup_matrix.prepare(encoded_input, feature_weights), MAX_RANKED,
+            snapshot.investor_matrix.prepare(encoded_input, feature_weights), weights
+        ))
+    return None
+
+def _page_ranking(data, rs_type, encoded_input, rows, scores, snapshot) -> Ranking:
+    kind = "startup" if rs_type == "startup_similarity" else "investor"
+    explanations = None
+    if data.get("explain") and rs_type in ("content", "startup_similarity"):
+        matrix = snapshot.startup_matrix if kind == "startup" else snapshot.investor_matrix
+        feature_weights = data.get("featureWeights")
+        sims = _row_similarities(matrix, encoded_input, rows, feature_weights)
+        explanations = _explanations(encoded_input, matrix.keys, sims, feature_weights)
+    return Ranking(kind, rows, scores, explanations)
+
+# Queries scored together per pass; bounds the rows x queries temporaries
+BATCH_CHUNK_SIZE = 64
+
+def get_batch_recommendations(items: list, top_k: int = 6, as_json: bool = False):
+    """
+    Recommendations for many validated payloads at once. Each chunk of
+    queries is scored against the investor and startup matrices in one
+    pass per feature group, then ranked per item exactly like get_recommendations.
+    Batches always rank exactly; "search": "approx" is ignored here.
+    Returns one result list (JSON bytes with as_json) per item, in order.
+    """
+    snapshot = current_snapshot()
+    results = []
+    for start in range(0, len(items), BATCH_CHUNK_SIZE):
+        for ranking in _rank_chunk(items[start:start + BATCH_CHUNK_SIZE], top_k, snapshot):
+            results.append(_output(ranking, snapshot, as_json))
+    return results
+
+def _rank_chunk(items, top_k, snapshot):
+    rs_types = [data.get("rs_type", "content") for data in items]
+    encoded_inputs = [data["processed"]["encoded"] for data in items]
+    feature_weights = [data.get("featureWeights") for data in items]
+
+    def columns(modes):
+        """Score column of every item whose mode is in modes (item -> column)."""
+        return {b: i for i, b in enumerate(b for b, rs_type in enumerate(rs_types) if rs_type in modes)}
+
+    # Each matrix is only scored for the items that need it
+    investor_cols = columns(("content", "hybrid"))
+    startup_cols = columns(("collaborative", "hybrid", "startup_similarity"))
+    collab_cols = columns(("collaborative", "hybrid"))
+    investor_scores = startup_scores = collab_scores = None
+    if investor_cols:
+        investor_scores = snapshot.investor_matrix.score_batch(
+            [encoded_inputs[b] for b in investor_cols], [feature_weights[b] for b in investor_cols]
+        )
+    if startup_cols:
+        startup_scores = snapshot.startup_matrix.score_batch(
+            [encoded_inputs[b] for b in startup_cols], [feature_weights[b] for b in startup_cols]
+        )
+    if collab_cols:
+        startup_sims = startup_scores[:, [startup_cols[b] for b in collab_cols]]
+        collab_scores = snapshot.interaction_matrix.T @ np.where(startup_sims > 0.1, startup_sims, 0.0)
+
+    rankings = []
+    for b, (rs_type, data) in enumerate(zip(rs_types, items)):
+        if rs_type == "content":
+            scores = investor_scores[:, investor_cols[b]]
+            top_rows = select_top_k(scores, top_k, min_score=0.1)
+            rankings.append(Ranking("investor", top_rows, scores[top_rows]))
+        elif rs_type == "collaborative":
+            rankings.append(collaborative_ranking(collab_scores[:, collab_cols[b]], top_k))
+        elif rs_type == "hybrid":
+            content = investor_scores[:, investor_cols[b]]
+            scores = blend_hybrid(
+                np.where(content > 0.1, content, 0.0),
+                collab_scores[:, collab_cols[b]],
+                data.get("activityWeight", 0.5),
+                data.get("investmentWeight", 0.5)
+            )
+            rankings.append(hybrid_ranking(scores, top_k))
+        elif rs_type == "startup_similarity":
+            scores = startup_scores[:, startup_cols[b]]
+            top_rows = select_top_k(scores, top_k)
+            rankings.append(Ranking("startup", top_rows, scores[top_rows]))
+        else:
+            rankings.append(EMPTY_RANKING)
+    return rankings
+
+# ===============================
+# Weight Sweeps
+# ===============================
+#
+# A sweep ranks one query under many sets of feature weights. Every row's
+# similarity to the query per feature group (groups x rows) is computed in
+# one scan per matrix; each weight set is then only a weighted sum of those
+# columns and a top-k, and ranks exactly as get_recommendations would with
+# the same "featureWeights".
+
+def sweep_recommendations(data: dict, weight_sets: list, top_k: int = 6, as_json: bool = False) -> list:
+    """
+    Recommendations for one validated payload under each featureWeights
+    override in weight_sets, in order (an empty set means the base weights).
+    Sweeps always rank exactly; "search" and "featureWeights" of the payload
+    are ignored. Returns one result list (JSON bytes with as_json) per set.
+    """
+    rs_type = data.get("rs_type", "content")
+    encoded_input = data["processed"]["encoded"]
+    explain = bool(data.get("explain", False))
+    snapshot = current_snapshot()
+
+    with stage("score"):
+        investor_sims = startup_sims = None
+        if rs_type in ("content", "hybrid"):
+            investor_sims = snapshot.investor_matrix.similarity_columns(encoded_input)
+        if rs_type in ("collaborative", "hybrid", "startup_similarity"):
+            startup_sims = snapshot.startup_matrix.similarity_columns(encoded_input)
+        rankings = [
+            _sweep_ranking(data, rs_type, encoded_input, explain, snapshot, investor_sims, startup_sims,
+                           feature_weights or None, top_k)
+            for feature_weights in weight_sets
+        ]
+    with stage("rank"):
+        return [_output(ranking, snapshot, as_json) for ranking in rankings]
+
+def _sweep_ranking(data, rs_type, encoded_input, explain, snapshot, investor_sims, startup_sims, feature_weights, top_k):
+    if rs_type in ("content", "startup_similarity"):
+        investors = rs_type == "content"
+        matrix = snapshot.investor_matrix if investors else snapshot.startup_matrix
+        sims = investor_sims if investors else startup_sims
+        scores = weighted_sum(sims, matrix.weight_vector(encoded_input, feature_weights))
+        rows = select_top_k(scores, top_k, min_score=0.1 if investors else None)
+        explanations = _explanations(encoded_input, matrix.keys, sims[:, rows].T, feature_weights) if explain else None
+        return Ranking("investor" if investors else "startup", rows, scores[rows], explanations)
+
+    if rs_type in ("collaborative", "hybrid"):
+        startup_scores = weighted_sum(startup_sims, snapshot.startup_matrix.weight_vector(encoded_input, feature_weights))
+        collaborative = _backed_scores(snapshot, startup_scores)
+        if rs_type == "collaborative":
+            return collaborative_ranking(collaborative, top_k)
+        content = weighted_sum(investor_sims, snapshot.investor_matrix.weight_vector(encoded_input, feature_weights))
+        scores = blend_hybrid(
+            np.where(content > 0.1, content, 0.0),
+            collaborative,
+            data.get("activityWeight", 0.5),
+            data.get("investmentWeight", 0.5)
+        )
+        return hybrid_ranking(scores, top_k)
+    return EMPTY_RANKING
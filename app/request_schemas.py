@@ -0,0 +1,61 @@
+from marshmallow import Schema, fields, validate, post_load
+from utils import full_preprocess
+from instrumentation import stage
+from pagination import MAX_PAGE_SIZE
+from scoring import FEATURE_KEYS
+
+# Most weight sets one /recommend/sweep request may rank
+MAX_WEIGHT_SETS = 100
+
+def feature_weights_field(**kwargs):
+    """Overrides of FEATURE_WEIGHTS: feature group -> weight >= 0."""
+    return fields.Dict(
+        keys=fields.String(validate=validate.OneOf(FEATURE_KEYS)),
+        values=fields.Float(validate=validate.Range(min=0)),
+        **kwargs
+    )
+
+# ===============================
+# Input Validation Schema
+# ===============================
+
+class RecommendRequestSchema(Schema):
+    industries = fields.List(fields.String(), required=True)
+    stages = fields.List(fields.String(), required=True)
+    rs_type = fields.String(required=True)
+    
+    # Optional with defaults or nullable
+    activityWeight = fields.Float(missing=0.5)
+    investmentWeight = fields.Float(missing=0.5)
+    
+    teamSize = fields.String(allow_none=True)
+    foundedYear = fields.String(allow_none=True)
+    location = fields.String(allow_none=True)
+    businessModel = fields.String(allow_none=True)
+    revenueStage = fields.Str()
+    customerSegment = fields.Str()
+
+    # Attach a per-feature score breakdown to each result
+    explain = fields.Boolean(missing=False)
+    # "approx" ranks content / startup_similarity with the LSH index when one was built
+    search = fields.String(missing="exact", validate=validate.OneOf(["exact", "approx"]))
+    # Paginate: return this many results plus a cursor for the next page
+    pageSize = fields.Integer(allow_none=True, validate=validate.Range(min=1, max=MAX_PAGE_SIZE))
+    # Per-request feature group weights, e.g. {"industry_vec": 0.6}; the rest keep their base weight
+    featureWeights = feature_weights_field(allow_none=True)
+
+    @post_load
+    def preprocess(self, data, **kwargs):
+        """
+        Runs full preprocessing after schema validation.
+        Injects both raw cleaned data and encoded vectors.
+        """
+        with stage("preprocess"):
+            processed = full_preprocess(data)
+        data["processed"] = processed  # Includes both raw and encoded versions
+        return data
+
+class RecommendSweepSchema(RecommendRequestSchema):
+    # One ranking per set of featureWeights overrides
+    weightSets = fields.List(feature_weights_field(), required=True,
+                             validate=validate.Length(min=1, max=MAX_WEIGHT_SETS))
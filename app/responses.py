@@ -0,0 +1,146 @@
+import json
+from typing import NamedTuple, Optional
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback, same compact output
+    orjson = None
+
+# ===============================
+# Compact JSON
+# ===============================
+
+def dumps(obj, default=None) -> bytes:
+    """Compact UTF-8 JSON, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+# ===============================
+# Result Formatting
+# ===============================
+
+def format_investor_result(score, inv):
+    return {
+        "id": inv.get("id"),
+        "Investor Name": inv.get("Name", "N/A"),
+        "Location": inv.get("Location", "N/A"),
+        "Score": round(float(score), 3),
+        "Investor Bio": inv.get("Investor Bio", "—"),
+        "Past Investment Types": inv.get("Past Investment Types", "—"),
+        "Investment Stages": inv.get("Investment Stages", "—")
+    }
+
+def format_startup_result(score, s):
+    return {
+        "Startup Name": s.get("Startup Name", "N/A"),
+        "Industry": s.get("Industry", "—"),
+        "Location": s.get("Location", "—"),
+        "Funding Stage": s.get("Funding Stage", "—"),
+        "Score": round(float(score), 3),
+        "Investor": s.get("investor_name", "—")
+    }
+
+def investor_detail(investor, raw=False) -> dict:
+    """Body of /investor/<name>; raw adds the normalized features behind the encoding."""
+    detail = {
+        "name": investor.get("Name"),
+        "location": investor.get("Location"),
+        "industries": investor.get("Investment Industries"),
+        "ticket_size": investor.get("Preferred Ticket Size"),
+        "num_investments": investor.get("Number of Investments"),
+        "recent_year": investor.get("Recent Activity Year"),
+    }
+    if raw:
+        detail["raw"] = investor.get("processed", {}).get("raw", {})
+    return detail
+
+def startup_detail(startup, investor) -> dict:
+    """Body of /startup/<name>."""
+    return {
+        "Startup Name": startup.get("Startup Name"),
+        "Industry": startup.get("Industry"),
+        "Location": startup.get("Location"),
+        "Funding Stage": startup.get("Funding Stage"),
+        "Description": startup.get("Description"),
+        "Founded Year": startup.get("Founded Year"),
+        "Team Size": startup.get("Team Size"),
+        "Revenue Stage": startup.get("Revenue Stage"),
+        "Business Model": startup.get("Business Model"),
+        "Customer Segment": startup.get("Customer Segment"),
+        "Investor": investor.get("Name"),
+        "Investor Location": investor.get("Location"),
+    }
+
+# ===============================
+# Pre-serialized Fragments
+# ===============================
+#
+# Every record's formatted result is serialized once, when the snapshot is
+# loaded, and split around its score: a response is then the two halves
+# of each fragment with the rounded score (and an explanation) between.
+# All fragments share one bytes buffer, so serving them never touches the
+# records, and pre-forked workers keep those pages shared.
+
+SCORE_FIELD = b'"Score":'
+
+class FragmentTable:
+    """Result JSON of every record without its score; row i is buffer[start:split] + score + buffer[split:end] + "}"."""
+
+    def __init__(self, records: list, formatter):
+        chunks, bounds, pos = [], [], 0
+        for record in records:
+            body = dumps(formatter(0.0, record))
+            split = body.index(SCORE_FIELD) + len(SCORE_FIELD)
+            # Drop the placeholder score and the closing brace
+            head, tail = body[:split], body[split + len(dumps(0.0)):-1]
+            chunks += (head, tail)
+            bounds.append((pos, pos + len(head), pos + len(head) + len(tail)))
+            pos += len(head) + len(tail)
+        self.buffer = b"".join(chunks)
+        self.bounds = np.array(bounds, dtype=np.int64).reshape(len(records), 3)
+
+    def __len__(self):
+        return len(self.bounds)
+
+    def render(self, rows, scores, explanations=None) -> bytes:
+        """JSON array of the rows' results, scores spliced in, best first as given."""
+        buffer = self.buffer
+        parts = []
+        for i, (row, score) in enumerate(zip(rows, scores)):
+            start, split, end = self.bounds[row].tolist()
+            part = buffer[start:split] + dumps(round(float(score), 3)) + buffer[split:end]
+            if explanations is not None:
+                part += b',"Explanation":' + dumps(explanations[i])
+            parts.append(part + b"}")
+        return b"[" + b",".join(parts) + b"]"
+
+# ===============================
+# Rankings
+# ===============================
+
+class Ranking(NamedTuple):
+    """One result list, best first, before it is formatted."""
+    kind: str                      # "investor" or "startup"
+    rows: np.ndarray
+    scores: np.ndarray
+    explanations: Optional[list] = None  # per row, when explain was asked for
+
+    def results(self, snapshot) -> list:
+        """Result dicts, as the engine's Python API returns them."""
+        if self.kind == "startup":
+            results = [format_startup_result(s, snapshot.startups[r]) for r, s in zip(self.rows, self.scores)]
+        else:
+            results = [format_investor_result(s, snapshot.investors[r]) for r, s in zip(self.rows, self.scores)]
+        if self.explanations is not None:
+            for result, explanation in zip(results, self.explanations):
+                result["Explanation"] = explanation
+        return results
+
+    def json(self, snapshot) -> bytes:
+        """The same results as a JSON array, from the snapshot's pre-serialized fragments."""
+        table = snapshot.startup_fragments if self.kind == "startup" else snapshot.investor_fragments
+        return table.render(self.rows, self.scores, self.explanations)
+
+EMPTY_RANKING = Ranking("investor", np.empty(0, dtype=np.intp), np.empty(0))
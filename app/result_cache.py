@@ -0,0 +1,71 @@
+import threading
+import time
+from collections import OrderedDict
+from scoring import FEATURE_KEYS
+
+# ===============================
+# Bounded LRU + TTL Result Cache
+# ===============================
+
+class ResultCache:
+    """
+    Thread-safe LRU cache with a per-entry time-to-live.
+    Cached values are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Cached value for key, or None on a miss or expired entry."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+def query_key(encoded_input: dict) -> tuple:
+    """
+    Canonical, hashable form of processed["encoded"]: the set positions of
+    every feature group. Equal encodings give equal keys.
+    """
+    return tuple(
+        tuple(i for i, v in enumerate(encoded_input.get(key, [])) if v)
+        for key in FEATURE_KEYS
+    )
+
+def weights_key(feature_weights) -> tuple:
+    """Hashable form of a request's feature weight overrides; () without any."""
+    return tuple(sorted(feature_weights.items())) if feature_weights else ()
@@ -1,48 +1,38 @@
-from marshmallow import Schema, fields, ValidationError, post_load
-from utils import full_preprocess
-
-# ===============================
-# Input Validation Schema
-# ===============================
-
-class RecommendRequestSchema(Schema):
-    industries = fields.List(fields.String(), required=True)
-    stages = fields.List(fields.String(), required=True)
-    rs_type = fields.String(required=True)
-    
-    # Optional with defaults or nullable
-    activityWeight = fields.Float(missing=0.5)
-    investmentWeight = fields.Float(missing=0.5)
-    
-    teamSize = fields.String(allow_none=True)
-    foundedYear = fields.String(allow_none=True)
-    location = fields.String(allow_none=True)
-    businessModel = fields.String(allow_none=True)
-    revenueStage = fields.Str()
-    customerSegment = fields.Str()
-
-    @post_load
-    def preprocess(self, data, **kwargs):
-        """
-        Runs full preprocessing after schema validation.
-        Injects both raw cleaned data and encoded vectors.
-        """
-        processed = full_preprocess(data)
-        data["processed"] = processed  # Includes both raw and encoded versions
-        return data
+from instrumentation import stage
 
 # ===============================
 # Utility for Validation
 # ===============================
+#
+# The marshmallow schemas are in request_schemas.py, imported by the first
+# validation, so importing the API does not import marshmallow.
 
-def validate_recommend_request(json_data):
+def validate_recommend_request(json_data, schema=None):
     """
     Validate input JSON using RecommendRequestSchema.
     Returns: (cleaned_data, errors)
     """
-    schema = RecommendRequestSchema()
+    from marshmallow import ValidationError
+    from request_schemas import RecommendRequestSchema
+    schema = schema or RecommendRequestSchema()
     try:
-        data = schema.load(json_data)
+        with stage("validate"):
+            data = schema.load(json_data)
         return data, None
     except ValidationError as err:
         return None, err.messages
+
+def validate_recommend_batch(items):
+    """
+    Validate every payload of a batch on its own, so one bad item
+    does not fail the rest.
+    Returns: list of (cleaned_data, errors), one per item
+    """
+    from request_schemas import RecommendRequestSchema
+    schema = RecommendRequestSchema()
+    return [validate_recommend_request(item, schema) for item in items]
+
+def validate_sweep_request(json_data):
+    """Validate a /recommend/sweep payload: a recommend payload plus weightSets."""
+    from request_schemas import RecommendSweepSchema
+    return validate_recommend_request(json_data, RecommendSweepSchema())
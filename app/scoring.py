@@ -0,0 +1,318 @@
+from typing import NamedTuple
+import numpy as np
+
+# ===============================
+# Feature Weights
+# ===============================
+
+# Base weight of every encoded feature group. A request may override any of
+# them ("featureWeights"); weights are renormalized over the groups the query
+# actually supplies with a weight above 0 (see query_weights).
+FEATURE_WEIGHTS = {
+    "industry_vec": 0.35,
+    "stage_vec": 0.15,
+    "location_vec": 0.1,
+    "team_vec": 0.05,
+    "year_vec": 0.05,
+    "business_model_vec": 0.1,
+    "revenue_stage_vec": 0.1,
+    "customer_segment_vec": 0.1
+}
+
+FEATURE_KEYS = list(FEATURE_WEIGHTS)
+
+# ===============================
+# Query Helpers
+# ===============================
+
+def query_weights(encoded_input: dict, feature_weights=None) -> dict:
+    """
+    Normalized weight of every feature group present in the query, from
+    FEATURE_WEIGHTS with any feature_weights overrides applied. Groups with
+    a missing or all-zero vector, or a weight of 0, are left out.
+    """
+    base = {**FEATURE_WEIGHTS, **feature_weights} if feature_weights else FEATURE_WEIGHTS
+    active_keys = [k for k in FEATURE_KEYS if base[k] > 0 and any(encoded_input.get(k, []))]
+    total_weight = sum(base[k] for k in active_keys)
+    return {k: base[k] / total_weight for k in active_keys}
+
+def explain_similarities(encoded_input: dict, similarities: dict, feature_weights=None) -> dict:
+    """Per-feature breakdown of a score: similarity x normalized weight = contribution."""
+    return {
+        key: {
+            "similarity": round(float(similarities[key]), 3),
+            "weight": round(weight, 3),
+            "contribution": round(float(weight * similarities[key]), 3),
+        }
+        for key, weight in query_weights(encoded_input, feature_weights).items()
+    }
+
+def top_k_rows(scores: np.ndarray, k: int, min_score=None) -> np.ndarray:
+    """
+    Row indices of the k best scores in row order, unranked; the same rows
+    select_top_k returns, found with a partial selection only.
+    """
+    if min_score is None:
+        idx = np.arange(len(scores))
+    else:
+        idx = np.flatnonzero(scores > min_score)
+    if k <= 0:
+        return idx[:0]
+    if k >= len(idx):
+        return idx
+
+    cand = scores[idx]
+    kth = np.partition(cand, len(cand) - k)[len(cand) - k]
+    keep = cand > kth
+    # Ties on the k-th score go to the earliest rows
+    ties = np.flatnonzero(cand == kth)
+    keep[ties[:k - np.count_nonzero(keep)]] = True
+    return idx[keep]
+
+def select_top_k(scores: np.ndarray, k: int, min_score=None) -> np.ndarray:
+    """
+    Row indices of the k best scores, best first. Ties keep catalog order,
+    like a stable descending sort would. Rows with score <= min_score are dropped.
+    """
+    idx = top_k_rows(scores, k, min_score)
+    order = np.lexsort((idx, -scores[idx]))
+    return idx[order]
+
+def weighted_sum(sims: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    sum_g weights[g] * sims[g] over a groups x rows similarity array. Groups
+    are added in order, so every caller gets bit-identical scores.
+    """
+    scores = np.zeros(sims.shape[1])
+    for g in np.flatnonzero(weights):
+        scores += weights[g] * sims[g]
+    return scores
+
+def blend_hybrid(content, collaborative, activity_weight, investment_weight):
+    """Unrounded hybrid score per investor; content below the 0.1 floor must already be 0."""
+    return activity_weight * content + investment_weight * collaborative
+
+# ===============================
+# Bitsets
+# ===============================
+#
+# Every encoded group is 0/1 (multi-hot industries and stages, one-hot for
+# the rest), so it is stored as bits: column c of a group is bit c % 64 of
+# its word c // 64. The overlap of two rows is the popcount of their AND and
+# cosine is |a AND b| / sqrt(|a| |b|).
+
+WORD_BITS = 64
+
+# Rows x queries cells per block of FeatureMatrix.score_batch
+BATCH_BLOCK_CELLS = 32768
+
+def n_words(width: int) -> int:
+    return -(-width // WORD_BITS)
+
+def pack_bits(block: np.ndarray) -> np.ndarray:
+    """Pack an n x width 0/1 block into n_words(width) x n uint64 words."""
+    n, width = block.shape
+    packed = np.packbits(np.asarray(block, dtype=np.uint8), axis=1, bitorder="little")
+    padded = np.zeros((n, n_words(width) * 8), dtype=np.uint8)
+    padded[:, :packed.shape[1]] = packed
+    return np.ascontiguousarray(padded.view("<u8").T).astype(np.uint64, copy=False)
+
+def unpack_bits(words: np.ndarray, width: int) -> np.ndarray:
+    """Inverse of pack_bits: n x width uint8 block."""
+    as_bytes = np.ascontiguousarray(words.T).astype("<u8", copy=False).view(np.uint8)
+    return np.unpackbits(as_bytes, axis=1, count=width, bitorder="little")
+
+_HALFWORD_COUNTS = np.array([bin(i).count("1") for i in range(1 << 16)], dtype=np.uint8)
+
+def _bitwise_count_table(words: np.ndarray) -> np.ndarray:
+    """np.bitwise_count for uint64 words, through a lookup table of 16-bit counts."""
+    halves = np.ascontiguousarray(words).view(np.uint16).reshape(words.shape + (4,))
+    return _HALFWORD_COUNTS[halves].sum(axis=-1, dtype=np.uint8)
+
+# np.bitwise_count is NumPy 2.0+; older versions fall back to the table
+bitwise_count = getattr(np, "bitwise_count", _bitwise_count_table)
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """Set bits of a group per row, summed over the group's words (words x ... -> ...)."""
+    if len(words) == 1:
+        return bitwise_count(words[0])
+    counts = np.zeros(words.shape[1:], dtype=np.intp)
+    for word in words:
+        counts += bitwise_count(word)
+    return counts
+
+# ===============================
+# Feature Matrix
+# ===============================
+
+def feature_blocks(records: list) -> dict:
+    """Stack the records' encoded vectors into one uint8 matrix per feature group."""
+    encoded = [r["processed"]["encoded"] for r in records]
+    if not encoded:
+        return {key: np.zeros((0, 0), dtype=np.uint8) for key in FEATURE_KEYS}
+    return {
+        key: np.array([e[key] for e in encoded], dtype=np.uint8).reshape(len(encoded), -1)
+        for key in FEATURE_KEYS
+    }
+
+class Query(NamedTuple):
+    """A query laid out against a FeatureMatrix (see FeatureMatrix.prepare)."""
+    vector: np.ndarray     # D, the query's 0/1 columns side by side
+    words: np.ndarray      # the same columns packed like FeatureMatrix.words
+    inv_norms: np.ndarray  # 1 / |q_g|, 0 for inactive groups
+    weights: np.ndarray    # normalized weight per group, 0 for inactive groups
+
+class FeatureMatrix:
+    """
+    Every record's encoded feature groups packed into uint64 words, with
+    the popcount of every group per row, so a query is scored against the
+    whole catalog with a vectorized AND and popcount per group.
+
+    Overlaps are exact integers. Normalization and weighting are then
+    applied element-wise, so a row's score never depends on which other
+    rows are scored with it.
+    """
+
+    def __init__(self, blocks: dict):
+        self.keys = [k for k in FEATURE_KEYS if k in blocks]
+        n_rows = len(blocks[self.keys[0]]) if self.keys else 0
+
+        # Column and word ranges of every group
+        self.slices = {}
+        self.word_slices = {}
+        start = word = 0
+        for key in self.keys:
+            width = blocks[key].shape[1]
+            self.slices[key] = slice(start, start + width)
+            self.word_slices[key] = slice(word, word + n_words(width))
+            start += width
+            word += n_words(width)
+        self.width = start
+
+        # words x rows, so every word scanned for a group is one contiguous array
+        self.words = np.zeros((word, n_rows), dtype=np.uint64)
+        for key in self.keys:
+            self.words[self.word_slices[key]] = pack_bits(blocks[key])
+        # Set bits per group and row (groups x rows)
+        self.counts = np.zeros((len(self.keys), n_rows), dtype=np.uint16)
+        for g, key in enumerate(self.keys):
+            self.counts[g] = popcount(self.words[self.word_slices[key]])
+
+        # 1 / sqrt(count) for every count a group can reach; 0 for empty groups
+        sizes = np.arange(max((s.stop - s.start for s in self.slices.values()), default=0) + 1)
+        with np.errstate(divide="ignore"):
+            self._inv_sqrt = np.where(sizes > 0, 1.0 / np.sqrt(sizes), 0.0)
+
+    @classmethod
+    def from_records(cls, records: list) -> "FeatureMatrix":
+        return cls(feature_blocks(records))
+
+    def __len__(self):
+        return self.words.shape[1]
+
+    def block(self, key: str, rows=None) -> np.ndarray:
+        """The uint8 0/1 block of one group (rows x width), unpacked from its words."""
+        words = self.words[self.word_slices[key]]
+        if rows is not None:
+            words = words[:, rows]
+        return unpack_bits(words, self.slices[key].stop - self.slices[key].start)
+
+    def dense(self, rows=None) -> np.ndarray:
+        """All groups unpacked side by side (rows x D, uint8)."""
+        blocks = [self.block(key, rows) for key in self.keys]
+        return np.hstack(blocks) if blocks else np.zeros((0, 0), dtype=np.uint8)
+
+    def inv_norms(self, rows=None) -> np.ndarray:
+        """1 / |r_g| per row and group (rows x groups), 0 for empty groups."""
+        counts = self.counts if rows is None else self.counts[:, rows]
+        return self._inv_sqrt[counts].T
+
+    def weight_vector(self, encoded_input: dict, feature_weights=None) -> np.ndarray:
+        """Normalized weight per group, in self.keys order (see query_weights)."""
+        weights = query_weights(encoded_input, feature_weights)
+        return np.array([weights.get(key, 0.0) for key in self.keys])
+
+    def prepare(self, encoded_input: dict, feature_weights=None) -> Query:
+        weights = query_weights(encoded_input, feature_weights)
+        vector = np.zeros(self.width, dtype=np.uint8)
+        inv_norms = np.zeros(len(self.keys))
+        weight_vec = np.zeros(len(self.keys))
+        for g, key in enumerate(self.keys):
+            if key not in weights:
+                continue
+            vec = np.asarray(encoded_input[key], dtype=np.float64)
+            vector[self.slices[key]] = vec
+            inv_norms[g] = 1.0 / np.sqrt(np.dot(vec, vec))
+            weight_vec[g] = weights[key]
+        words = np.zeros(len(self.words), dtype=np.uint64)
+        for key in self.keys:
+            words[self.word_slices[key]] = pack_bits(vector[None, self.slices[key]])[:, 0]
+        return Query(vector, words, inv_norms, weight_vec)
+
+    def _similarities(self, query: Query, rows=None) -> np.ndarray:
+        """Cosine similarity per group (groups x rows, each group one contiguous array)."""
+        words = self.words if rows is None else self.words[:, rows]
+        counts = self.counts if rows is None else self.counts[:, rows]
+        sims = np.zeros((len(self.keys), words.shape[1]))
+        for g in np.flatnonzero(query.weights):
+            ws = self.word_slices[self.keys[g]]
+            overlaps = popcount(words[ws] & query.words[ws, None]).astype(np.float64)
+            sims[g] = overlaps * self._inv_sqrt[counts[g]] * query.inv_norms[g]
+        return sims
+
+    def group_similarities(self, query: Query, rows=None) -> np.ndarray:
+        """Cosine similarity per feature group (rows x groups); 0 for groups the query lacks."""
+        return self._similarities(query, rows).T
+
+    def score_rows(self, query: Query, rows=None, return_similarities=False):
+        """
+        Weighted score of the given rows (all rows when rows is None).
+        With return_similarities, also the per-group similarities behind them.
+        """
+        sims = self._similarities(query, rows)
+        scores = weighted_sum(sims, query.weights)
+        return (scores, sims.T) if return_similarities else scores
+
+    def score(self, encoded_input: dict, feature_weights=None) -> np.ndarray:
+        """Weighted cosine score of every row against the query."""
+        return self.score_rows(self.prepare(encoded_input, feature_weights))
+
+    def similarity_columns(self, encoded_input: dict, rows=None) -> np.ndarray:
+        """
+        Cosine similarity of the rows to the query in every group it supplies
+        (groups x rows). weighted_sum() of it with weight_vector(encoded_input,
+        overrides) equals score(encoded_input, overrides), for any overrides,
+        without scanning the rows again.
+        """
+        return self._similarities(self.prepare(encoded_input), rows)
+
+    def score_batch(self, encoded_inputs: list, feature_weights=None) -> np.ndarray:
+        """
+        Scores of every row against many queries (rows x queries), with one
+        AND and popcount per group across all queries. Column b equals
+        score(encoded_inputs[b], feature_weights[b]).
+        """
+        feature_weights = feature_weights or [None] * len(encoded_inputs)
+        queries = [self.prepare(e, w) for e, w in zip(encoded_inputs, feature_weights)]
+        scores = np.zeros((len(self), len(queries)))
+        if not queries:
+            return scores
+
+        words = np.stack([q.words for q in queries], axis=1)  # words x queries
+        inv_norms = np.stack([q.inv_norms for q in queries])
+        weights = np.stack([q.weights for q in queries])
+        # Groups no query supplies would add exactly nothing
+        groups = np.flatnonzero(weights.any(axis=0))
+
+        # Rows are scored a block at a time, so the block's words and the
+        # rows x queries temporaries stay in cache across every group
+        block = max(BATCH_BLOCK_CELLS // len(queries), 256)
+        for start in range(0, len(self), block):
+            rows = slice(start, start + block)
+            out = scores[rows]
+            for g in groups:
+                ws = self.word_slices[self.keys[g]]
+                overlaps = popcount(self.words[ws, rows, None] & words[ws, None, :]).astype(np.float64)
+                sims = overlaps * self._inv_sqrt[self.counts[g, rows]][:, None] * inv_norms[:, g]
+                out += weights[:, g] * sims
+        return scores
@@ -1,8 +1,18 @@
 import os
-import json
 import csv
+import argparse
+import multiprocessing
+from collections import deque
 from utils import full_preprocess
 from preprocess import normalize_text
+import numpy as np
+from feature_store import FeatureStoreWriter, load_feature_store
+from scoring import FeatureMatrix
+from ann_index import ANN_FILE, DEFAULT_TABLES, MAX_SCANNED_FRACTION, LSHIndex, save_ann, recall_at_k, encoded_rows
+from catalog_io import iter_json_array, JsonArrayWriter, JsonObjectWriter, join_spans
+from manifest import (
+    record_hash, load_manifest, save_manifest, discard_manifest, stale_reason, PreviousBuild
+)
 
 # ============ Paths Setup ============
 
@@ -10,15 +20,16 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 
 INVESTOR_DATA_FILE = os.path.join(DATA_DIR, "investors.json")
-INVESTOR_CACHE_FILE = os.path.join(DATA_DIR, "preprocessed_investors.json")
-STARTUP_CACHE_FILE = os.path.join(DATA_DIR, "preprocessed_startups.json")
-INTERACTIONS_FILE = os.path.join(DATA_DIR, "interactions.json")
-INTERACTION_MATRIX_FILE = os.path.join(DATA_DIR, "interaction_matrix.csv")
 
-investors = []
-startups = []
-interactions = {}        # {startup_id: [investor_ids]}
-interaction_matrix = {}  # {investor_id: {startup_id: 1}}
+# Output file names, written into the chosen data directory
+INVESTOR_CACHE_FILE = "preprocessed_investors.json"
+STARTUP_CACHE_FILE = "preprocessed_startups.json"
+INTERACTIONS_FILE = "interactions.json"
+INTERACTION_MATRIX_FILE = "interaction_matrix.csv"
+FEATURE_STORE_FILE = "feature_store.npz"
+
+# Investors per pool task
+CHUNK_SIZE = 256
 
 # ============ Feature Extractors ============
 
@@ -44,57 +55,258 @@ def extract_startup_features(s) -> dict:
         "customerSegment": normalize_text(s.get("Customer Segment", ""))
     }
 
-# ============ Build Datasets ============
+# ============ Preprocess (worker side) ============
+
+def preprocess_investor(inv_id, inv) -> dict:
+    """Preprocess one raw investor and its portfolio in place; ids depend only on input position."""
+    inv_features = extract_investor_features(inv)
+    inv["processed"] = full_preprocess(inv_features)
+    inv["id"] = inv_id
+
+    for s_id, s in enumerate(inv.get("Invested Startups", [])):
+        s_features = extract_startup_features(s)
+        s["processed"] = full_preprocess(s_features)
+        s["investor_name"] = inv.get("Name", "Unknown")
+        s["startup_id"] = f"{inv_id}_{s_id}"
+    return inv
+
+def preprocess_chunk(chunk) -> list:
+    """chunk: list of (inv_id, raw investor) pairs. Runs in a pool worker."""
+    return [preprocess_investor(inv_id, inv) for inv_id, inv in chunk]
+
+# ============ Streaming Pipeline ============
+
+def iter_chunks(input_file, chunk_size):
+    chunk = []
+    for inv_id, inv in enumerate(iter_json_array(input_file)):
+        chunk.append((inv_id, inv))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
 
-with open(INVESTOR_DATA_FILE, "r", encoding="utf-8") as f:
-    raw_investors = json.load(f)
+def preprocessed_chunks(input_file, workers=None, chunk_size=CHUNK_SIZE, previous=None):
+    """
+    Yield (investors, record hashes) per chunk, preprocessed and in input
+    order. Chunks fan out over a process pool; at most 2 x workers chunks are
+    in flight, so memory stays bounded however large the input is. With a
+    PreviousBuild, investors whose raw record is unchanged are restored from
+    it and only the rest are sent to the pool.
+    """
+    def split(chunk):
+        hashes = [record_hash(inv) for _, inv in chunk]
+        stale = [item for item, h in zip(chunk, hashes) if previous is None or h not in previous]
+        return hashes, stale
 
-    for inv_id, inv in enumerate(raw_investors):
-        inv_features = extract_investor_features(inv)
-        processed_inv = full_preprocess(inv_features)
-        inv["processed"] = processed_inv
-        inv["id"] = inv_id
-        investors.append(inv)
+    def merge(chunk, hashes, fresh):
+        fresh = iter(fresh)
+        investors = [
+            previous.restore(inv_id, inv, h) if previous is not None and h in previous else next(fresh)
+            for (inv_id, inv), h in zip(chunk, hashes)
+        ]
+        return investors, hashes
 
-        for s_id, s in enumerate(inv.get("Invested Startups", [])):
-            s_features = extract_startup_features(s)
-            s_processed = full_preprocess(s_features)
-            s["processed"] = s_processed
-            s["investor_name"] = inv.get("Name", "Unknown")
-            s["startup_id"] = f"{inv_id}_{s_id}"
-            startups.append(s)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for chunk in iter_chunks(input_file, chunk_size):
+            hashes, stale = split(chunk)
+            yield merge(chunk, hashes, preprocess_chunk(stale))
+        return
 
-            # Update interaction map and matrix
-            interactions.setdefault(s["startup_id"], []).append(inv_id)
-            interaction_matrix.setdefault(inv_id, {})[s["startup_id"]] = 1
+    with multiprocessing.Pool(workers) as pool:
+        pending = deque()
+        for chunk in iter_chunks(input_file, chunk_size):
+            hashes, stale = split(chunk)
+            pending.append((chunk, hashes, pool.apply_async(preprocess_chunk, (stale,))))
+            if len(pending) >= 2 * workers:
+                chunk, hashes, result = pending.popleft()
+                yield merge(chunk, hashes, result.get())
+        while pending:
+            chunk, hashes, result = pending.popleft()
+            yield merge(chunk, hashes, result.get())
 
 # ============ Write Outputs ============
 
-with open(INVESTOR_CACHE_FILE, "w", encoding="utf-8") as f1:
-    json.dump(investors, f1, indent=2)
+def write_interaction_matrix(path, portfolios):
+    """
+    Dense investors x startups CSV. portfolios is [(inv_id, [startup_ids])]; an
+    investor's row only has ones in its own startup columns.
+    """
+    startup_ids = sorted(sid for _, sids in portfolios for sid in sids)
+    columns = {sid: col for col, sid in enumerate(startup_ids)}
+
+    with open(path, "w", newline='', encoding="utf-8") as f_csv:
+        writer = csv.writer(f_csv)
+        header = ["Investor_ID"] + startup_ids
+        writer.writerow(header)
+
+        for inv_id, sids in portfolios:
+            row = [0] * len(startup_ids)
+            for sid in sids:
+                row[columns[sid]] = 1
+            writer.writerow([inv_id] + row)
+
+EXPORT_FILES = [INVESTOR_CACHE_FILE, STARTUP_CACHE_FILE, INTERACTIONS_FILE]
+
+def build_catalog(input_file, data_dir, workers=None, chunk_size=CHUNK_SIZE, dense_matrix=True, previous=None):
+    """
+    Stream input_file through preprocessing and write every output as chunks
+    complete. Outputs are written to .tmp files and swapped in at the end.
+    Returns (investors, re-encoded investors).
+    """
+    def tmp(name):
+        return os.path.join(data_dir, name + ".tmp")
+
+    store = FeatureStoreWriter(tmp(FEATURE_STORE_FILE))
+    portfolios = []  # [(investor_id, [startup_ids])] for the dense matrix
+    investor_hashes = []
+    spans = {name: [] for name in EXPORT_FILES}
+    reencoded = 0
+
+    with JsonArrayWriter(tmp(INVESTOR_CACHE_FILE)) as investor_out, \
+            JsonArrayWriter(tmp(STARTUP_CACHE_FILE)) as startup_out, \
+            JsonObjectWriter(tmp(INTERACTIONS_FILE)) as interaction_out:
+        outputs = dict(zip(EXPORT_FILES, [investor_out, startup_out, interaction_out]))
 
-with open(STARTUP_CACHE_FILE, "w", encoding="utf-8") as f2:
-    json.dump(startups, f2, indent=2)
+        for investors, hashes in preprocessed_chunks(input_file, workers, chunk_size, previous):
+            investor_hashes.extend(hashes)
+            reencoded += sum(1 for h in hashes if previous is None or h not in previous)
 
-with open(INTERACTIONS_FILE, "w", encoding="utf-8") as f3:
-    json.dump(interactions, f3, indent=2)
+            startups = []
+            interactions = {}  # {startup_id: [investor_ids]}
+            for inv, h in zip(investors, hashes):
+                inv_id = inv["id"]
+                portfolio = inv.get("Invested Startups", [])
+                for s in portfolio:
+                    startups.append(s)
+                    interactions.setdefault(s["startup_id"], []).append(inv_id)
+                if dense_matrix:
+                    portfolios.append((inv_id, [s["startup_id"] for s in portfolio]))
+
+                if previous is not None and previous.unchanged_at(inv_id, h, EXPORT_FILES):
+                    for name, out in outputs.items():
+                        spans[name].append(out.write_fragment(previous.fragment(name, inv_id)))
+                    continue
+
+                spans[INVESTOR_CACHE_FILE].append(investor_out.write(inv))
+                spans[STARTUP_CACHE_FILE].append(join_spans([startup_out.write(s) for s in portfolio]))
+                spans[INTERACTIONS_FILE].append(join_spans([
+                    interaction_out.write(s["startup_id"], interactions[s["startup_id"]]) for s in portfolio
+                ]))
+
+            store.add(investors, startups, interactions)
+
+    store.close()
+    if previous is not None:
+        previous.close()
+
+    # investors x startups cells; skipped for large synthetic catalogs
+    if dense_matrix:
+        write_interaction_matrix(tmp(INTERACTION_MATRIX_FILE), portfolios)
+
+    discard_manifest(data_dir)
+    for name in EXPORT_FILES + [FEATURE_STORE_FILE] + ([INTERACTION_MATRIX_FILE] if dense_matrix else []):
+        os.replace(tmp(name), os.path.join(data_dir, name))
+    save_manifest(data_dir, investor_hashes, spans)
+    return len(investor_hashes), reencoded
+
+def incremental_build(input_file, data_dir, workers=None, dense_matrix=True):
+    """
+    Rebuild re-encoding only investors added or changed since the last build;
+    falls back to a full build when the previous one can't be reused.
+    """
+    store_path = os.path.join(data_dir, FEATURE_STORE_FILE)
+    reason = stale_reason(load_manifest(data_dir), store_path)
+    if reason:
+        print(f"⚠️  Full rebuild: {reason}")
+        return build_catalog(input_file, data_dir, workers=workers, dense_matrix=dense_matrix)
+
+    previous = PreviousBuild(load_manifest(data_dir), store_path)
+    return build_catalog(input_file, data_dir, workers=workers, dense_matrix=dense_matrix, previous=previous)
+
+# ============ Approximate Index ============
+
+# Startup rows sampled as queries for the recall report
+RECALL_SAMPLE = 200
+
+def build_ann_index(data_dir, tables=DEFAULT_TABLES, bits=None, sample=RECALL_SAMPLE):
+    """
+    Hash the stored feature blocks and report, per matrix, recall@10 of the
+    approximate search against the exact engine and the share of rows it
+    scored. Only indexes scoring at most MAX_SCANNED_FRACTION of their rows
+    are saved to ann_index.npz ("built" in the report); approx requests rank
+    the others exactly.
+    """
+    store = load_feature_store(os.path.join(data_dir, FEATURE_STORE_FILE))
+    matrices = {
+        "investor": FeatureMatrix(store["investor_blocks"]),
+        "startup": FeatureMatrix(store["startup_blocks"]),
+    }
+    indexes = {name: LSHIndex(matrix, tables=tables, bits=bits) for name, matrix in matrices.items()}
 
-# ============ Write Interaction Matrix ============
+    # Startup profiles stand in for /recommend payloads; investors are
+    # ranked with the same min score as recommend_by_content
+    startups = matrices["startup"]
+    rng = np.random.default_rng(0)
+    queries = encoded_rows(startups, rng.choice(len(startups), min(sample, len(startups)), replace=False))
+    report = {}
+    for name, index in indexes.items():
+        report[name] = recall_at_k(index, queries, k=10, min_score=0.1 if name == "investor" else None)
+        scanned = report[name]["scanned_fraction"]
+        report[name]["built"] = scanned is not None and scanned <= MAX_SCANNED_FRACTION
 
-startup_ids = sorted({s["startup_id"] for s in startups})
+    path = os.path.join(data_dir, ANN_FILE)
+    kept = {name: index for name, index in indexes.items() if report[name]["built"]}
+    if kept:
+        save_ann(path + ".tmp", kept)
+        os.replace(path + ".tmp", path)
+    elif os.path.exists(path):
+        os.remove(path)
+    return report
 
-with open(INTERACTION_MATRIX_FILE, "w", newline='', encoding="utf-8") as f_csv:
-    writer = csv.writer(f_csv)
-    header = ["Investor_ID"] + startup_ids
-    writer.writerow(header)
+def main(input_file=INVESTOR_DATA_FILE, data_dir=DATA_DIR, dense_matrix=True, workers=None, incremental=False,
+         ann=True, ann_tables=DEFAULT_TABLES, ann_bits=None):
+    build = incremental_build if incremental else build_catalog
+    total, reencoded = build(input_file, data_dir, workers=workers, dense_matrix=dense_matrix)
+    if ann:
+        report = build_ann_index(data_dir, ann_tables, ann_bits)
+    elif os.path.exists(os.path.join(data_dir, ANN_FILE)):
+        # An index hashed from the previous catalog would rank from stale buckets
+        os.remove(os.path.join(data_dir, ANN_FILE))
 
-    for inv in investors:
-        inv_id = inv["id"]
-        row = [inv_id] + [interaction_matrix.get(inv_id, {}).get(sid, 0) for sid in startup_ids]
-        writer.writerow(row)
+    print(f"✅ Preprocessing complete ({reencoded} of {total} investors encoded):")
+    print("   → preprocessed_investors.json")
+    print("   → preprocessed_startups.json")
+    print("   → interactions.json")
+    if dense_matrix:
+        print("   → interaction_matrix.csv")
+    print("   → feature_store.npz")
+    print("   → manifest.json")
+    if ann:
+        print("   → ann_index.npz" if any(r["built"] for r in report.values()) else "   → ann_index.npz skipped")
+        for name, r in report.items():
+            if r["scanned_fraction"] is None:
+                continue
+            status = "" if r["built"] else f" (over {MAX_SCANNED_FRACTION:.0%}: not saved, approx ranks exactly)"
+            print(f"      {name}s: recall@10 {r['recall']}, {r['scanned_fraction']:.1%} of rows scored, "
+                  f"{r['approx_ms']:.2f} ms vs {r['exact_ms']:.2f} ms exact{status}")
 
-print("✅ Preprocessing complete:")
-print("   → preprocessed_investors.json")
-print("   → preprocessed_startups.json")
-print("   → interactions.json")
-print("   → interaction_matrix.csv")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preprocess investors.json into the data caches.")
+    parser.add_argument("--input", default=INVESTOR_DATA_FILE)
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--workers", type=int, help="pool size (default: one per core)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only re-encode investors changed since the last build")
+    parser.add_argument("--no-dense-matrix", dest="dense_matrix", action="store_false",
+                        help="skip interaction_matrix.csv")
+    parser.add_argument("--no-ann", dest="ann", action="store_false",
+                        help="skip the approximate index (search: \"approx\" then ranks exactly)")
+    parser.add_argument("--ann-tables", type=int, default=DEFAULT_TABLES,
+                        help="hash tables; more raise recall and latency")
+    parser.add_argument("--ann-bits", type=int,
+                        help="bits per code; more shrink the buckets (default: from catalog size)")
+    args = parser.parse_args()
+    main(args.input, args.data_dir, args.dense_matrix, args.workers, args.incremental,
+         args.ann, args.ann_tables, args.ann_bits)
@@ -0,0 +1,218 @@
+"""
+Pre-fork production server.
+
+The master process imports the app, loads the catalog once (startup.py), moves
+every loaded object out of the garbage collector's reach with gc.freeze()
+and then forks workers that all accept on one shared listening socket.
+Workers never write to the catalog: the feature matrices, indexes and
+interaction matrix are NumPy buffers and the records are frozen, so their
+pages stay shared copy-on-write instead of being copied into every worker.
+
+    python app/serve.py --workers 16 --port 8000 [--warmup]
+
+Reloading: SIGHUP to the master (or POST /admin/reload to any worker, or a
+file change with MATCHMAKER_WATCH_INTERVAL set) loads the new catalog in the
+master, forks a fresh set of workers from it and gracefully stops the old
+ones after their in-flight request. SIGTERM / SIGINT shut everything down.
+"""
+import os
+import gc
+import sys
+import time
+import signal
+import socket
+import logging
+import argparse
+import threading
+
+from werkzeug.serving import make_server
+
+logger = logging.getLogger("matchmaker.serve")
+
+DEFAULT_WORKERS = int(os.environ.get("MATCHMAKER_WORKERS", os.cpu_count() or 1))
+# Serve each worker's requests on threads, so one slow request does not hold up the others
+DEFAULT_THREADED = os.environ.get("MATCHMAKER_THREADED", "0").lower() in ("1", "true", "yes")
+# Rank one query of every type in the master before forking (see startup.py)
+DEFAULT_WARMUP = os.environ.get("MATCHMAKER_WARMUP", "0").lower() in ("1", "true", "yes")
+# Seconds a stopping worker gets to finish its request before SIGKILL
+GRACEFUL_TIMEOUT = 30.0
+
+def freeze_loaded_objects():
+    """
+    Collect garbage once, then exclude everything alive from future
+    collections. A collection pass writes to every tracked object's header,
+    which would copy the catalog's pages into each worker that ran one.
+    """
+    gc.unfreeze()
+    gc.collect()
+    gc.freeze()
+
+def listen(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    # Every worker polls this socket; the ones that lose a race for a
+    # connection must get EAGAIN instead of blocking in accept()
+    sock.setblocking(False)
+    return sock
+
+# ===============================
+# Worker
+# ===============================
+
+def run_worker(app, sock, host, port, master_pid, threaded=False):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    import api
+    # The master owns the catalog: a reload requested here is handed to it
+    api.reload_catalog = lambda: os.kill(master_pid, signal.SIGHUP) is None
+
+    server = make_server(host, port, app, threaded=threaded, fd=sock.fileno())
+    # Tracked request threads, so server_close() below waits for them to finish
+    server.daemon_threads = False
+
+    def stop(signum, frame):
+        # shutdown() waits for serve_forever to return, so it can't run on this thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        server.serve_forever()
+        server.server_close()
+    finally:
+        # The child leaves through os._exit (see Master.spawn), which skips
+        # atexit, which would otherwise stop the shard processes
+        from sharding import close_shard_pool
+        close_shard_pool()
+
+# ===============================
+# Master
+# ===============================
+
+class Master:
+    """Keeps `workers` children alive and rotates them when the catalog changes."""
+
+    def __init__(self, app, sock, host, port, workers, threaded=False):
+        import recommender_engine
+        self.engine = recommender_engine
+        self.app = app
+        self.sock = sock
+        self.host = host
+        self.port = port
+        self.n_workers = workers
+        self.threaded = threaded
+        self.children = {}  # pid -> catalog version it was forked with
+        self.version = self.engine.current_snapshot().version
+        self._reload = False
+        self._stop = False
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            # Whatever fails, the child must never return into the master's loop
+            try:
+                run_worker(self.app, self.sock, self.host, self.port, os.getppid(), self.threaded)
+            except BaseException:
+                logger.exception("Worker %d failed", os.getpid())
+                os._exit(1)
+            finally:
+                os._exit(0)
+        self.children[pid] = self.version
+
+    def run(self):
+        signal.signal(signal.SIGHUP, lambda *_: setattr(self, "_reload", True))
+        signal.signal(signal.SIGTERM, lambda *_: setattr(self, "_stop", True))
+        signal.signal(signal.SIGINT, lambda *_: setattr(self, "_stop", True))
+
+        freeze_loaded_objects()
+        for _ in range(self.n_workers):
+            self.spawn()
+        logger.info("Serving on %s:%d with %d workers (catalog version %d)",
+                    self.host, self.port, self.n_workers, self.version)
+
+        while not self._stop:
+            time.sleep(0.2)
+            self.reap()
+            if self._reload:
+                self._reload = False
+                try:
+                    self.engine.load_data()
+                except Exception:
+                    logger.exception("Catalog reload failed; workers keep version %d", self.version)
+            # A reload may also come from the file watcher thread (see api.py)
+            if self.engine.current_snapshot().version != self.version:
+                self.rotate()
+            while sum(1 for v in self.children.values() if v == self.version) < self.n_workers:
+                self.spawn()
+
+        self.shutdown()
+
+    def reap(self):
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            version = self.children.pop(pid, None)
+            if version == self.version and not self._stop:
+                logger.warning("Worker %d exited with status %d; replacing it", pid, status)
+
+    def rotate(self):
+        """Fork workers on the new catalog, then drain the old ones."""
+        old = [pid for pid, v in self.children.items() if v == self.version]
+        self.version = self.engine.current_snapshot().version
+        freeze_loaded_objects()
+        for _ in range(self.n_workers):
+            self.spawn()
+        for pid in old:
+            self._signal(pid, signal.SIGTERM)
+        logger.info("Rotated workers onto catalog version %d", self.version)
+
+    def shutdown(self):
+        for pid in list(self.children):
+            self._signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + GRACEFUL_TIMEOUT
+        while self.children and time.monotonic() < deadline:
+            time.sleep(0.1)
+            self.reap()
+        for pid in list(self.children):
+            self._signal(pid, signal.SIGKILL)
+        self.sock.close()
+
+    def _signal(self, pid, signum):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            self.children.pop(pid, None)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="worker processes (default: MATCHMAKER_WORKERS or one per core)")
+    parser.add_argument("--threaded", action="store_true", default=DEFAULT_THREADED,
+                        help="handle each worker's requests on threads (default: MATCHMAKER_THREADED)")
+    parser.add_argument("--warmup", action="store_true", default=DEFAULT_WARMUP,
+                        help="warm the engine up in the master before forking (default: MATCHMAKER_WARMUP)")
+    parser.add_argument("--backlog", type=int, default=2048)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(process)d %(name)s: %(message)s")
+
+    from startup import initialize, step
+    with step("app"):
+        from api import app
+    # Loads the catalog, once, in the master; the workers inherit it
+    initialize(warmup=args.warmup)
+
+    sock = listen(args.host, args.port, args.backlog)
+    Master(app, sock, args.host, args.port, args.workers, args.threaded).run()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+import os
+import gc
+import time
+import signal
+import threading
+import multiprocessing
+import numpy as np
+from scoring import select_top_k, blend_hybrid
+
+# ===============================
+# Sharded Scoring
+# ===============================
+#
+# For catalogs of millions of rows one query's full scan is the whole
+# latency. A ShardPool splits it over persistent worker processes: each
+# shard scores a contiguous range of rows and returns only its local top k,
+# and the parent merges those into the exact global top k (any row of the
+# global top k is in its own shard's top k).
+#
+# The shards are forked from the process holding the snapshot, so like
+# serve.py's workers they read its feature matrices and interaction matrix
+# through shared copy-on-write pages; a request sends only the prepared
+# query and gets back k rows and scores per shard.
+#
+# Collaborative and hybrid scores are sharded by investor: a shard sums, for
+# each of its investors, the startups they backed in the same order as the
+# full sparse product, so the scores are bit-identical to the single-process
+# engine.
+
+SHARDS = int(os.environ.get("MATCHMAKER_SHARDS", "0"))
+# Catalogs smaller than this are scored in-process; the round trip costs more than it saves
+MIN_SHARDED_ROWS = int(os.environ.get("MATCHMAKER_SHARD_MIN_ROWS", "200000"))
+# Seconds to wait for a shard before scoring in-process instead
+SHARD_TIMEOUT = float(os.environ.get("MATCHMAKER_SHARD_TIMEOUT", "30"))
+
+def split_rows(n: int, parts: int) -> list:
+    """`parts` contiguous (start, stop) ranges covering 0 .. n, sizes within one of each other."""
+    bounds = np.linspace(0, n, parts + 1).astype(np.int64)
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+class ShardPlan:
+    """Row ranges per shard and, per investor range, the interactions its collaborative scores read."""
+
+    def __init__(self, snapshot, shards: int):
+        from scipy.sparse import csr_matrix
+        self.investor_ranges = split_rows(len(snapshot.investors), shards)
+        self.startup_ranges = split_rows(len(snapshot.startups), shards)
+
+        # investor x startup, each row's startups in ascending order: the
+        # order in which interaction_matrix.T @ sims adds them up
+        by_investor = snapshot.interaction_matrix.T.tocsr()
+        by_investor.sort_indices()
+        self.portfolios = []  # per investor range: (startup rows read, investors x those startups)
+        for start, stop in self.investor_ranges:
+            part = by_investor[start:stop]
+            startups, columns = np.unique(part.indices, return_inverse=True)
+            local = csr_matrix((part.data, columns.astype(part.indices.dtype), part.indptr),
+                               shape=(stop - start, len(startups)))
+            self.portfolios.append((startups, local))
+
+# Snapshot and plan per catalog version, set in the parent before a pool
+# forks (or re-forks a dead shard) and read by the shards
+_SHARDED = {}
+
+def _run_shard(conn, inherited):
+    """Shard process: answer (task, args) messages until None or the parent goes away."""
+    # Other shards' pipe ends would hide a dead shard's EOF from the parent
+    for other in inherited:
+        other.close()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Nothing a shard allocates outlives a task; keep collections off the inherited heap
+    gc.freeze()
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        task, args = message
+        try:
+            reply = (True, task(*args))
+        except Exception as e:
+            reply = (False, f"{type(e).__name__}: {e}")
+        conn.send(reply)
+
+def _top_k_task(version, kind, shard, query, k, min_score):
+    snapshot, plan = _SHARDED[version]
+    if kind == "startup":
+        matrix, (start, stop) = snapshot.startup_matrix, plan.startup_ranges[shard]
+    else:
+        matrix, (start, stop) = snapshot.investor_matrix, plan.investor_ranges[shard]
+    scores = matrix.score_rows(query, slice(start, stop))
+    top = select_top_k(scores, k, min_score=min_score)
+    return top + start, scores[top]
+
+def _collaborative_task(version, shard, query, k, investor_query, weights):
+    snapshot, plan = _SHARDED[version]
+    start, stop = plan.investor_ranges[shard]
+    startups, local = plan.portfolios[shard]
+    startup_sims = snapshot.startup_matrix.score_rows(query, startups)
+    scores = local @ np.where(startup_sims > 0.1, startup_sims, 0.0)
+    if investor_query is not None:
+        content = snapshot.investor_matrix.score_rows(investor_query, slice(start, stop))
+        scores = blend_hybrid(np.where(content > 0.1, content, 0.0), scores, *weights)
+    top = select_top_k(scores, k, min_score=0.0)
+    return top + start, scores[top]
+
+def merge_top_k(parts: list, k: int):
+    """Exact (rows, scores) top k, best first, of per-shard top-k lists."""
+    rows = np.concatenate([p[0] for p in parts]).astype(np.intp)
+    scores = np.concatenate([p[1] for p in parts])
+    # Ties resolve to the earliest catalog row, as in an unsharded ranking
+    order = np.argsort(rows, kind="stable")
+    rows, scores = rows[order], scores[order]
+    top = select_top_k(scores, k)
+    return rows[top], scores[top]
+
+class ShardPool:
+    """One persistent process per shard over one catalog snapshot, each behind its own pipe."""
+
+    def __init__(self, snapshot, shards: int):
+        self.version = snapshot.version
+        self.shards = shards
+        self.pid = os.getpid()
+        self.broken = False
+        self.closed = False
+        _SHARDED[self.version] = (snapshot, ShardPlan(snapshot, shards))
+
+        context = multiprocessing.get_context("fork")
+        pipes = [context.Pipe() for _ in range(shards)]
+        self._conns = [parent for parent, _ in pipes]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._processes = []
+        for shard, (_, child) in enumerate(pipes):
+            inherited = [end for pair in pipes for end in pair if end is not child]
+            process = context.Process(target=_run_shard, args=(child, inherited),
+                                      name=f"matchmaker-shard-{shard}", daemon=True)
+            process.start()
+            self._processes.append(process)
+        for _, child in pipes:
+            child.close()
+
+    def _gather(self, task, args_per_shard):
+        """Send one task to every shard, then collect the replies in shard order."""
+        if self.broken or self.closed:
+            raise RuntimeError(f"shard pool of version {self.version} is not running")
+        deadline = time.monotonic() + SHARD_TIMEOUT
+        held = []
+        try:
+            # Locks are taken in shard order and each is released as its
+            # reply arrives, so concurrent requests pipeline through the shards
+            for lock, conn, args in zip(self._locks, self._conns, args_per_shard):
+                lock.acquire()
+                held.append(lock)
+                conn.send((task, args))
+            replies = []
+            for shard, conn in enumerate(self._conns):
+                if not conn.poll(max(deadline - time.monotonic(), 0.0)):
+                    raise TimeoutError(f"shard {shard} did not answer within {SHARD_TIMEOUT}s")
+                ok, reply = conn.recv()
+                held.pop(0).release()
+                if not ok:
+                    raise RuntimeError(f"shard {shard}: {reply}")
+                replies.append(reply)
+            return replies
+        except Exception:
+            # Unread replies would be taken for the next request's; the next
+            # request starts a new pool instead
+            self.broken = True
+            raise
+        finally:
+            for lock in held:
+                lock.release()
+
+    def top_k(self, kind: str, query, k: int, min_score=None):
+        """(rows, scores) of the k best rows of the investor or startup matrix, best first."""
+        parts = self._gather(_top_k_task, [
+            (self.version, kind, shard, query, k, min_score) for shard in range(self.shards)
+        ])
+        return merge_top_k(parts, k)
+
+    def collaborative_top_k(self, startup_query, k: int, investor_query=None, weights=None):
+        """
+        (rows, scores) of the k best investors by collaborative score, or by
+        hybrid score when investor_query and weights (activity, investment)
+        are given.
+        """
+        parts = self._gather(_collaborative_task, [
+            (self.version, shard, startup_query, k, investor_query, weights) for shard in range(self.shards)
+        ])
+        return merge_top_k(parts, k)
+
+    def close(self):
+        """Stop the shards once the tasks already sent to them are answered."""
+        self.closed = True
+
+        def stop():
+            for lock, conn in zip(self._locks, self._conns):
+                with lock:
+                    try:
+                        conn.send(None)
+                    except OSError:
+                        pass
+            for process in self._processes:
+                process.join(SHARD_TIMEOUT)
+            self.terminate()
+
+        threading.Thread(target=stop, name="shard-stop", daemon=True).start()
+
+    def terminate(self):
+        self.closed = True
+        for process in self._processes:
+            if process.is_alive():
+                process.kill()
+            process.join()
+        for conn in self._conns:
+            conn.close()
+        _SHARDED.pop(self.version, None)
+
+# ===============================
+# Pool Per Process And Snapshot
+# ===============================
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def shard_pool(snapshot, rows: int):
+    """
+    The ShardPool for this snapshot when sharding is on and a scan covers
+    at least MIN_SHARDED_ROWS rows, else None. Started on first use in each
+    process (pre-forked workers get their own); a pool of an older snapshot
+    is retired once the new one is up.
+    """
+    global _pool
+    if SHARDS < 2 or rows < MIN_SHARDED_ROWS:
+        return None
+    pool = _pool
+    if pool is not None and pool.version == snapshot.version and pool.pid == os.getpid() and not pool.broken:
+        return pool
+    with _pool_lock:
+        pool = _pool
+        if pool is not None and pool.pid != os.getpid():
+            # Inherited through a fork; its processes belong to the parent
+            pool = _pool = None
+        if pool is None or pool.version != snapshot.version or pool.broken:
+            if pool is not None and pool.version > snapshot.version:
+                return None  # a request still running on a replaced snapshot
+            _pool = ShardPool(snapshot, SHARDS)
+            if pool is not None and pool.broken:
+                pool.terminate()
+            elif pool is not None:
+                pool.close()
+        return _pool
+
+def close_shard_pool():
+    """Stop this process's shards, if it started any."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool.pid == os.getpid():
+            _pool.terminate()
+        _pool = None
@@ -0,0 +1,98 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from contextlib import contextmanager
+
+# ===============================
+# Application Context
+# ===============================
+#
+# Importing the app modules does no I/O and leaves the heavy dependencies
+# alone: the label table is read on the first encode, the catalog (and with
+# it scipy) on the first current_snapshot(), and marshmallow on the first
+# validation. Whatever a request needs is loaded then, so scripts and tests
+# that import a module pay only for what they use.
+#
+# Servers call initialize() instead, before taking traffic (serve.py before
+# forking its workers, asgi.py at lifespan startup), and get a report of what
+# each step cost. With warmup it also ranks one query of every type, so the
+# first real requests do not pay for first calls either.
+#
+#     python app/startup.py --warmup    # print the startup report and exit
+
+logger = logging.getLogger("matchmaker.startup")
+
+RS_TYPES = ("content", "collaborative", "hybrid", "startup_similarity")
+
+_report = {}  # step -> ms
+
+@contextmanager
+def step(name: str):
+    """Time one startup step into the report."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _report[name] = round((time.perf_counter() - start) * 1000, 1)
+
+def _process_age_ms():
+    """Milliseconds since this process was started (10 ms clock ticks), or None off Linux."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Field 22, counted after the parenthesized command name
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return round((uptime - start_ticks / os.sysconf("SC_CLK_TCK")) * 1000, 1)
+
+def _warmup_payloads(labels) -> list:
+    """One /recommend payload per ranking type, built from the first labels of each list."""
+    base = {
+        "industries": labels.data.get("industries", [])[:1],
+        "stages": labels.data.get("stages", [])[:1],
+    }
+    if labels.data.get("locations"):
+        base["location"] = labels.data["locations"][0]
+    return [dict(base, rs_type=rs_type) for rs_type in RS_TYPES]
+
+def initialize(warmup: bool = False) -> dict:
+    """
+    Load the application context now rather than on first use: the label
+    table, the catalog snapshot and request validation, plus with warmup one
+    ranking of every type. Returns startup_report().
+    """
+    with step("imports"):
+        import recommender_engine
+        from schemas import validate_recommend_request
+        from utils import label_table
+    with step("labels"):
+        labels = label_table()
+    with step("catalog"):
+        snapshot = recommender_engine.current_snapshot()
+    with step("validation"):
+        validated = [validate_recommend_request(p) for p in _warmup_payloads(labels)]
+    if warmup:
+        with step("warmup"):
+            recommender_engine.warm_up([data for data, errors in validated if not errors])
+
+    _report["process_age_ms"] = _process_age_ms()
+    logger.info("Catalog version %d ready; startup %s", snapshot.version, json.dumps(_report))
+    return startup_report()
+
+def startup_report() -> dict:
+    """Milliseconds per startup step so far, and the process age when initialize() finished."""
+    return dict(_report)
+
+def main():
+    parser = argparse.ArgumentParser(description="Initialize the app once and print the startup report.")
+    parser.add_argument("--warmup", action="store_true", help="also rank one query of every type")
+    args = parser.parse_args()
+    print(json.dumps(initialize(warmup=args.warmup)))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,9 @@
 import os
 import json
+import hashlib
+import threading
 from typing import List, Dict
+import numpy as np
 from preprocess import (
     normalize_text,
     canonicalize_industry,
@@ -10,35 +13,115 @@ from preprocess import (
 )
 
 # ===============================
-# Load Dynamic Label Constants
+# Label Lists
 # ===============================
 
+class LabelList(list):
+    """
+    A label list with an O(1) label -> position map, used by the encoders in
+    place of list.index (first occurrence wins, as with list.index).
+    """
+
+    def __init__(self, labels=()):
+        super().__init__(labels)
+        self.positions = {}
+        for i, label in enumerate(self):
+            self.positions.setdefault(label, i)
+
+# ===============================
+# Label Table
+# ===============================
+#
+# The label lists are read from labels.json on first use rather than at
+# import, so importing the encoders costs no I/O; startup.initialize() reads
+# them up front in servers.
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 LABELS_PATH = os.path.join(BASE_DIR, "data", "labels.json")
 
-with open(LABELS_PATH, "r") as f:
-    label_data = json.load(f)
+TEAM_BUCKETS = LabelList(["Small", "Medium", "Large", "Enterprise", "Unknown"])
+YEAR_BUCKETS = LabelList(["New", "Growing", "Established", "Unknown"])
+
+class LabelTable:
+    """labels.json as loaded, its version, and the label lists and column layout the encoders use."""
+
+    def __init__(self, label_data: dict):
+        self.data = label_data
+        # Identifies the label table the encoders are built from; /dropdowns
+        # serves this same table under this version
+        self.version = hashlib.blake2b(
+            json.dumps(label_data, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8"),
+            digest_size=16,
+        ).hexdigest()
+
+        self.industries = LabelList(sorted(list(set([canonicalize_industry(i) for i in label_data.get("industries", []) if i]))))
+        self.stages = LabelList(sorted(list(set([canonicalize_stage(s) for s in label_data.get("stages", []) if s]))))
+        self.locations = LabelList(sorted([normalize_text(l) for l in label_data.get("locations", []) if l]))
+        self.business_models = LabelList(sorted([normalize_text(bm) for bm in label_data.get("business_models", []) if bm]))
+        self.revenue_stages = LabelList(sorted([normalize_text(r) for r in label_data.get("revenue_stages", []) if r]))
+        self.customer_segments = LabelList(sorted([normalize_text(c) for c in label_data.get("customer_segments", []) if c]))
+
+        # (encoded key, cleaned key, labels, multi-hot) in encoded-vector order
+        self.layout = [
+            ("industry_vec", "industries", self.industries, True),
+            ("stage_vec", "stages", self.stages, True),
+            ("location_vec", "location_region", self.locations, False),
+            ("team_vec", "team_bucket", TEAM_BUCKETS, False),
+            ("year_vec", "year_bucket", YEAR_BUCKETS, False),
+            ("business_model_vec", "business_model", self.business_models, False),
+            ("revenue_stage_vec", "revenue_stage", self.revenue_stages, False),
+            ("customer_segment_vec", "customer_segment", self.customer_segments, False),
+        ]
 
-INDUSTRY_LABELS = sorted(list(set([canonicalize_industry(i) for i in label_data.get("industries", []) if i])))
-STAGE_LABELS = sorted(list(set([canonicalize_stage(s) for s in label_data.get("stages", []) if s])))
-LOCATION_LABELS = sorted([normalize_text(l) for l in label_data.get("locations", []) if l])
-BUSINESS_MODEL_LABELS = sorted([normalize_text(bm) for bm in label_data.get("business_models", []) if bm])
-REVENUE_STAGE_LABELS = sorted([normalize_text(r) for r in label_data.get("revenue_stages", []) if r])
-CUSTOMER_SEGMENT_LABELS = sorted([normalize_text(c) for c in label_data.get("customer_segments", []) if c])
+        # Column range of every encoded group within one concatenated feature row
+        self.slices = {}
+        self.width = 0
+        for key, _, labels, _ in self.layout:
+            self.slices[key] = slice(self.width, self.width + len(labels))
+            self.width += len(labels)
 
+_label_table = None
+_label_lock = threading.Lock()
 
-TEAM_BUCKETS = ["Small", "Medium", "Large", "Enterprise", "Unknown"]
-YEAR_BUCKETS = ["New", "Growing", "Established", "Unknown"]
+def label_table() -> LabelTable:
+    """The LabelTable of LABELS_PATH, read on the first call."""
+    global _label_table
+    if _label_table is None:
+        with _label_lock:
+            if _label_table is None:
+                with open(LABELS_PATH, "r") as f:
+                    _label_table = LabelTable(json.load(f))
+    return _label_table
+
+# The module constants the label table replaced, still importable (and
+# loaded on first access): utils.INDUSTRY_LABELS is label_table().industries
+_LABEL_TABLE_ATTRIBUTES = {
+    "label_data": "data",
+    "LABELS_VERSION": "version",
+    "INDUSTRY_LABELS": "industries",
+    "STAGE_LABELS": "stages",
+    "LOCATION_LABELS": "locations",
+    "BUSINESS_MODEL_LABELS": "business_models",
+    "REVENUE_STAGE_LABELS": "revenue_stages",
+    "CUSTOMER_SEGMENT_LABELS": "customer_segments",
+    "FEATURE_LAYOUT": "layout",
+    "FEATURE_SLICES": "slices",
+    "FEATURE_WIDTH": "width",
+}
+
+def __getattr__(name):
+    if name in _LABEL_TABLE_ATTRIBUTES:
+        return getattr(label_table(), _LABEL_TABLE_ATTRIBUTES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ===============================
 # Encoder / Decoder Utilities
 # ===============================
 
 def encode_label(value: str, label_list: List[str]) -> int:
-    try:
-        return label_list.index(value)
-    except ValueError:
-        return -1
+    if not isinstance(label_list, LabelList):
+        label_list = LabelList(label_list)
+    return label_list.positions.get(value, -1)
 
 def decode_label(index: int, label_list: List[str]) -> str:
     return label_list[index] if 0 <= index < len(label_list) else "Unknown"
@@ -58,12 +141,27 @@ def multi_hot_encode(values: List[str], label_list: List[str]) -> List[int]:
             vec[idx] = 1
     return vec
 
+def encode_into(cleaned: Dict, out: np.ndarray) -> np.ndarray:
+    """
+    Write the one/multi-hot encoding of cleaned features straight into a
+    zeroed, preallocated row of label_table().width columns (laid out by its slices).
+    """
+    table = label_table()
+    for key, cleaned_key, labels, multi in table.layout:
+        offset = table.slices[key].start
+        values = cleaned[cleaned_key] if multi else (cleaned[cleaned_key],)
+        for val in values:
+            idx = labels.positions.get(val)
+            if idx is not None:
+                out[offset + idx] = 1
+    return out
+
 # ===============================
 # Common Pipeline Helpers
 # ===============================
 
-def full_preprocess(data: Dict) -> Dict:
-    cleaned = {
+def clean_features(data: Dict) -> Dict:
+    return {
         "industries": [canonicalize_industry(i) for i in data.get("industries", [])],
         "stages": [canonicalize_stage(s) for s in data.get("stages", [])],
         "location_region": normalize_text(data.get("location", "").split(",")[0].strip()),
@@ -74,16 +172,12 @@ def full_preprocess(data: Dict) -> Dict:
         "customer_segment": normalize_text(data.get("customerSegment", ""))
     }
 
-    encoded = {
-        "industry_vec": multi_hot_encode(cleaned["industries"], INDUSTRY_LABELS),
-        "stage_vec": multi_hot_encode(cleaned["stages"], STAGE_LABELS),
-        "location_vec": one_hot_encode(cleaned["location_region"], LOCATION_LABELS),
-        "team_vec": one_hot_encode(cleaned["team_bucket"], TEAM_BUCKETS),
-        "year_vec": one_hot_encode(cleaned["year_bucket"], YEAR_BUCKETS),
-        "business_model_vec": one_hot_encode(cleaned["business_model"], BUSINESS_MODEL_LABELS),
-        "revenue_stage_vec": one_hot_encode(cleaned["revenue_stage"], REVENUE_STAGE_LABELS),
-        "customer_segment_vec": one_hot_encode(cleaned["customer_segment"], CUSTOMER_SEGMENT_LABELS),
-    }
+def full_preprocess(data: Dict) -> Dict:
+    cleaned = clean_features(data)
+    table = label_table()
+
+    row = encode_into(cleaned, np.zeros(table.width, dtype=np.uint8))
+    encoded = {key: row[table.slices[key]].tolist() for key, _, _, _ in table.layout}
 
     return {
         "raw": cleaned,
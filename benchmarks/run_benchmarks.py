@@ -0,0 +1,202 @@
+"""
+Recommender engine benchmarks on synthetic catalogs.
+
+For every catalog size this generates an investors.json-shaped catalog,
+runs it through the script.py preprocessing, then starts one fresh worker
+process per recommendation mode on the result to measure startup time,
+p50/p99 latency, throughput and that mode's peak RSS (ru_maxrss only ever
+grows, so modes sharing a process would each report the largest so far).
+
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 100000
+    python benchmarks/run_benchmarks.py --compare old.json new.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import resource
+import subprocess
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+APP_DIR = os.path.join(REPO_DIR, "app")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic_catalog import generate_catalog, label_distributions, random_payload
+
+MODES = ["content", "collaborative", "hybrid", "startup_similarity"]
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def _percentile(sorted_values, q):
+    idx = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+# ===============================
+# Worker: one catalog and mode, fresh process
+# ===============================
+
+def run_worker(mode: str, n_queries: int, seed: int) -> dict:
+    """Runs inside a process whose MATCHMAKER_DATA_DIR points at the catalog."""
+    start = time.perf_counter()
+    import recommender_engine as engine
+    engine.current_snapshot()  # the catalog loads on first use
+    startup_ms = (time.perf_counter() - start) * 1000
+    report = {"startup_ms": round(startup_ms, 1), "startup_rss_mb": _peak_rss_mb()}
+
+    from utils import full_preprocess
+    rng = random.Random(seed)
+    dists = label_distributions()
+    queries = [full_preprocess(random_payload(rng, dists)) for _ in range(n_queries)]
+
+    # Scoring functions are called directly so the result cache stays out of the numbers
+    calls = {
+        "content": lambda q: engine.recommend_by_content(q["encoded"], 6),
+        "collaborative": lambda q: engine.recommend_by_collaborative(q["encoded"], 6),
+        "hybrid": lambda q: engine.recommend_by_hybrid(q["encoded"], 0.5, 0.5, 6),
+        "startup_similarity": lambda q: engine.recommend_similar_startups(q, 6),
+    }
+    call = calls[mode]
+    call(queries[0])  # warm up
+    latencies = []
+    total_start = time.perf_counter()
+    for q in queries:
+        t = time.perf_counter()
+        call(q)
+        latencies.append((time.perf_counter() - t) * 1000)
+    total = time.perf_counter() - total_start
+    latencies.sort()
+    report["mode"] = {
+        "p50_ms": round(_percentile(latencies, 50), 3),
+        "p99_ms": round(_percentile(latencies, 99), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "throughput_qps": round(len(latencies) / total, 1),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+    return report
+
+# ===============================
+# Driver
+# ===============================
+
+def bench_size(n_investors: int, workdir: str, n_queries: int, seed: int) -> dict:
+    import script
+
+    data_dir = os.path.join(workdir, f"catalog_{n_investors}")
+    os.makedirs(data_dir, exist_ok=True)
+    input_file = os.path.join(data_dir, "investors.json")
+
+    t = time.perf_counter()
+    catalog = generate_catalog(n_investors, seed=seed)
+    with open(input_file, "w", encoding="utf-8") as f:
+        json.dump(catalog, f)
+    generate_s = time.perf_counter() - t
+    del catalog
+
+    t = time.perf_counter()
+    script.main(input_file, data_dir, dense_matrix=False)
+    preprocess_s = time.perf_counter() - t
+
+    env = dict(os.environ, MATCHMAKER_DATA_DIR=data_dir)
+    report = {"modes": {}}
+    for mode in MODES:
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", mode,
+             "--queries", str(n_queries), "--seed", str(seed)],
+            env=env, cwd=APP_DIR, capture_output=True, text=True, check=True,
+        )
+        worker = json.loads(out.stdout.strip().splitlines()[-1])
+        report["modes"][mode] = worker["mode"]
+        # Startup is the same in every worker; the first one's is reported
+        report.setdefault("startup_ms", worker["startup_ms"])
+        report.setdefault("startup_rss_mb", worker["startup_rss_mb"])
+    report.update({
+        "investors": n_investors,
+        "generate_s": round(generate_s, 2),
+        "preprocess_s": round(preprocess_s, 2),
+    })
+    return report
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def compare(old_path: str, new_path: str):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{'size':>8} {'mode':<20} {'p50 old→new (ms)':>24} {'p99 old→new (ms)':>24} {'qps ratio':>10}")
+    for size, result in new["results"].items():
+        base = old["results"].get(size)
+        if not base:
+            continue
+        for mode, m in result["modes"].items():
+            b = base["modes"].get(mode)
+            if not b:
+                continue
+            ratio = m["throughput_qps"] / b["throughput_qps"] if b["throughput_qps"] else float("inf")
+            print(f"{size:>8} {mode:<20} {b['p50_ms']:>11.3f} → {m['p50_ms']:<10.3f} "
+                  f"{b['p99_ms']:>11.3f} → {m['p99_ms']:<10.3f} {ratio:>9.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=200, help="queries per mode")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="where catalogs are built (default: a temp dir)")
+    parser.add_argument("--output", help="results JSON (default: benchmarks/results/bench-<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two results files")
+    parser.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.queries, args.seed)))
+        return
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    commit = _git_commit()
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        for size in args.sizes:
+            print(f"⏱️  Benchmarking {size} investors...")
+            results[str(size)] = bench_size(size, workdir, args.queries, args.seed)
+            for mode, m in results[str(size)]["modes"].items():
+                print(f"   {mode:<20} p50 {m['p50_ms']:.3f} ms  p99 {m['p99_ms']:.3f} ms  {m['throughput_qps']:.0f} qps")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench-{commit}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "meta": {
+                "commit": commit,
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "queries_per_mode": args.queries,
+                "seed": args.seed,
+            },
+            "results": results,
+        }, f, indent=2)
+    print(f"✅ Results written to {output}")
+
+if __name__ == "__main__":
+    main()
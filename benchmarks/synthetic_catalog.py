@@ -0,0 +1,114 @@
+import os
+import json
+import random
+from collections import Counter
+
+# ===============================
+# Synthetic investors.json Generator
+# ===============================
+#
+# Builds catalogs shaped like app/data/investors.json at any size. Labels
+# come from app/data/labels.json; each label is drawn with its frequency in
+# the shipped investors.json (plus one, so unseen labels still appear), and
+# portfolio sizes follow the shipped catalog's distribution.
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+DATA_DIR = os.path.join(APP_DIR, "data")
+LABELS_FILE = os.path.join(DATA_DIR, "labels.json")
+INVESTOR_FILE = os.path.join(DATA_DIR, "investors.json")
+
+def _load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _weighted(values, observed: Counter):
+    values = list(values)
+    return values, [observed.get(v.lower(), 0) + 1 for v in values]
+
+def label_distributions(labels=None, investors=None) -> dict:
+    """(values, weights) per label set, weighted by the shipped catalog."""
+    labels = labels if labels is not None else _load_json(LABELS_FILE, {})
+    investors = investors if investors is not None else _load_json(INVESTOR_FILE, [])
+
+    startups = [s for inv in investors for s in inv.get("Invested Startups", [])]
+    counts = {
+        "industries": Counter(i.lower() for inv in investors for i in inv.get("Investment Industries", []))
+            + Counter(str(s.get("Industry", "")).lower() for s in startups),
+        "stages": Counter(st.lower() for inv in investors for st in inv.get("Investment Stages", []))
+            + Counter(str(s.get("Funding Stage", "")).lower() for s in startups),
+        "locations": Counter(inv.get("Location", "").split(",")[0].strip().lower() for inv in investors)
+            + Counter(str(s.get("Location", "")).split(",")[0].strip().lower() for s in startups),
+        "team_sizes": Counter(str(s.get("Team Size", "")).lower() for s in startups),
+        "founded_years": Counter(str(s.get("Founded Year", "")).lower() for s in startups),
+        "business_models": Counter(str(s.get("Business Model", "")).lower() for s in startups),
+        "revenue_stages": Counter(str(s.get("Revenue Stage", "")).lower().replace("-", " ") for s in startups),
+        "customer_segments": Counter(str(s.get("Customer Segment", "")).lower() for s in startups),
+    }
+    portfolio = Counter(len(inv.get("Invested Startups", [])) for inv in investors) or Counter({1: 1})
+
+    dists = {key: _weighted(labels.get(key, []), counts[key]) for key in counts}
+    dists["portfolio_sizes"] = (list(portfolio), list(portfolio.values()))
+    return dists
+
+def _pick(rng, dist):
+    values, weights = dist
+    return rng.choices(values, weights)[0] if values else ""
+
+def _sample(rng, dist, low, high):
+    values, weights = dist
+    if not values:
+        return []
+    n = rng.randint(low, min(high, len(values)))
+    picked = set()
+    while len(picked) < n:
+        picked.add(rng.choices(values, weights)[0])
+    return sorted(picked)
+
+def generate_catalog(n_investors: int, seed: int = 0, dists=None) -> list:
+    """n_investors records shaped like investors.json, deterministic for a seed."""
+    rng = random.Random(seed)
+    dists = dists or label_distributions()
+
+    catalog = []
+    for i in range(n_investors):
+        city = _pick(rng, dists["locations"])
+        startups = []
+        for j in range(_pick(rng, dists["portfolio_sizes"])):
+            startups.append({
+                "Startup Name": f"Startup {i}-{j}",
+                "Industry": _pick(rng, dists["industries"]),
+                "Location": f"{_pick(rng, dists['locations'])}, Synthetic",
+                "Funding Stage": _pick(rng, dists["stages"]),
+                "Description": "Synthetic benchmark startup",
+                "Founded Year": _pick(rng, dists["founded_years"]),
+                "Team Size": _pick(rng, dists["team_sizes"]),
+                "Revenue Stage": _pick(rng, dists["revenue_stages"]),
+                "Business Model": _pick(rng, dists["business_models"]),
+                "Customer Segment": _pick(rng, dists["customer_segments"]),
+            })
+        catalog.append({
+            "Name": f"Synthetic Investor {i}",
+            "Investment Industries": _sample(rng, dists["industries"], 1, 4),
+            "Investment Stages": _sample(rng, dists["stages"], 1, 3),
+            "Past Investment Types": ["Equity"],
+            "Location": f"{city}, Synthetic",
+            "Investor Bio": f"Synthetic investor based in {city}.",
+            "Invested Startups": startups,
+            "Number of Investments": len(startups),
+        })
+    return catalog
+
+def random_payload(rng, dists) -> dict:
+    """A /recommend-shaped payload drawn from the same distributions."""
+    return {
+        "industries": _sample(rng, dists["industries"], 1, 3),
+        "stages": _sample(rng, dists["stages"], 1, 2),
+        "location": _pick(rng, dists["locations"]),
+        "teamSize": _pick(rng, dists["team_sizes"]),
+        "foundedYear": _pick(rng, dists["founded_years"]),
+        "businessModel": _pick(rng, dists["business_models"]),
+        "revenueStage": _pick(rng, dists["revenue_stages"]),
+        "customerSegment": _pick(rng, dists["customer_segments"]),
+    }
@@ -0,0 +1,36 @@
+import os
+import sys
+import random
+
+import pytest
+
+# The app modules import each other top-level, as when run from app/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+RS_TYPES = ("content", "collaborative", "hybrid", "startup_similarity")
+
+
+@pytest.fixture
+def payloads():
+    """Deterministic /recommend payloads over the bundled label table, every ranking type in turn."""
+    from utils import label_table
+    labels = label_table().data
+    rng = random.Random(0)
+    optional = {
+        "location": "locations", "teamSize": "team_sizes", "foundedYear": "founded_years",
+        "businessModel": "business_models", "revenueStage": "revenue_stages", "customerSegment": "customer_segments",
+    }
+    result = []
+    for i in range(40):
+        payload = {
+            "industries": rng.sample(labels["industries"], rng.randint(0, 3)),
+            "stages": rng.sample(labels["stages"], rng.randint(1, 2)),
+            "rs_type": RS_TYPES[i % len(RS_TYPES)],
+            "activityWeight": round(rng.random(), 2),
+        }
+        payload["investmentWeight"] = round(1 - payload["activityWeight"], 2)
+        for field, key in optional.items():
+            if rng.random() < 0.6:
+                payload[field] = rng.choice(labels[key])
+        result.append(payload)
+    return result
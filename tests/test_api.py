@@ -0,0 +1,29 @@
+import pytest
+
+from api import app
+from recommender_engine import current_snapshot
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+@pytest.fixture
+def investor_name():
+    return current_snapshot().investors[0]["Name"]
+
+
+@pytest.mark.parametrize("fuzzy", ["false", "true"])
+@pytest.mark.parametrize("limit", ["0", "-5"])
+def test_autocomplete_limit_below_one_returns_one_match(client, investor_name, fuzzy, limit):
+    response = client.get("/autocomplete", query_string={"q": investor_name, "fuzzy": fuzzy, "limit": limit})
+    assert response.status_code == 200
+    assert response.get_json()["matches"] == [investor_name]
+
+
+def test_autocomplete_limit_is_capped(client):
+    # An empty prefix matches every name
+    response = client.get("/autocomplete", query_string={"q": "", "limit": "1000"})
+    assert response.status_code == 200
+    assert len(response.get_json()["matches"]) == min(50, len(current_snapshot().investor_names))
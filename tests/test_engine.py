@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+
+import inverted_index
+import scoring
+from ann_index import encoded_rows
+from inverted_index import InvertedIndex
+from recommender_engine import current_snapshot
+from scoring import FeatureMatrix, query_weights, select_top_k
+from utils import label_table
+
+N_ROWS = 400
+N_QUERIES = 60
+
+
+def random_blocks(rng, n_rows):
+    """0/1 blocks shaped like the label table's groups, with empty groups and duplicate rows."""
+    blocks = {}
+    for key, _, labels, multi_hot in label_table().layout:
+        block = np.zeros((n_rows, len(labels)), dtype=np.uint8)
+        for row in range(n_rows):
+            if rng.random() < 0.1:
+                continue
+            n_set = rng.integers(1, 4) if multi_hot else 1
+            block[row, rng.choice(len(labels), n_set, replace=False)] = 1
+        blocks[key] = block
+    for key in blocks:
+        blocks[key][-20:] = blocks[key][:20]
+    return blocks
+
+
+def random_query(rng, blocks):
+    encoded = {}
+    for key, block in blocks.items():
+        vec = np.zeros(block.shape[1], dtype=int)
+        if block.shape[1] and rng.random() < 0.8:
+            vec[rng.choice(block.shape[1], rng.integers(1, min(3, block.shape[1]) + 1), replace=False)] = 1
+        encoded[key] = vec.tolist()
+    if not any(any(v) for v in encoded.values()):
+        encoded["industry_vec"][0] = 1
+    return encoded
+
+
+def random_weights(rng):
+    if rng.random() < 0.5:
+        return None
+    return {key: float(rng.choice([0.0, 0.2, 1.0])) for key in rng.choice(scoring.FEATURE_KEYS, 3, replace=False)}
+
+
+def reference_scores(blocks, encoded, feature_weights=None):
+    """sum_g w_g * cos(q_g, r_g) with plain float cosines, 0 where either side is empty."""
+    scores = np.zeros(len(next(iter(blocks.values()))))
+    for key, weight in query_weights(encoded, feature_weights).items():
+        rows = blocks[key].astype(np.float64)
+        q = np.asarray(encoded[key], dtype=np.float64)
+        norms = np.linalg.norm(rows, axis=1) * np.linalg.norm(q)
+        cos = np.divide(rows @ q, norms, out=np.zeros_like(norms), where=norms > 0)
+        scores += weight * cos
+    return scores
+
+
+def test_feature_matrix_matches_cosine_reference():
+    rng = np.random.default_rng(0)
+    blocks = random_blocks(rng, N_ROWS)
+    matrix = FeatureMatrix(blocks)
+    queries = [(random_query(rng, blocks), random_weights(rng)) for _ in range(N_QUERIES)]
+
+    batch = matrix.score_batch([q for q, _ in queries], [w for _, w in queries])
+    for b, (encoded, weights) in enumerate(queries):
+        expected = reference_scores(blocks, encoded, weights)
+        scores = matrix.score(encoded, weights)
+        np.testing.assert_allclose(scores, expected, rtol=1e-12, atol=1e-15)
+        # Rankings agree once float noise is rounded away; ties keep row order
+        for min_score in (None, 0.1):
+            assert select_top_k(np.round(scores, 9), 10, min_score).tolist() == \
+                select_top_k(np.round(expected, 9), 10, min_score).tolist()
+        np.testing.assert_array_equal(batch[:, b], scores)
+
+
+def test_popcount_table_matches_bitwise_count():
+    words = np.random.default_rng(1).integers(0, 2 ** 63, size=(3, 257), dtype=np.uint64)
+    words[0, :5] = [0, 1, 2 ** 63, 2 ** 64 - 1, 2 ** 32 + 1]
+    expected = [[bin(int(w)).count("1") for w in row] for row in words]
+    assert scoring._bitwise_count_table(words).tolist() == expected
+    assert scoring.bitwise_count(words).tolist() == expected
+
+
+@pytest.mark.parametrize("name", ["investor", "startup"])
+def test_inverted_index_matches_full_scan(monkeypatch, name):
+    # The bundled catalog is below MIN_INDEXED_ROWS: force the tier path
+    monkeypatch.setattr(inverted_index, "MIN_INDEXED_ROWS", 0)
+    monkeypatch.setattr(inverted_index, "MAX_TIER_FRACTION", 1.0)
+    snapshot = current_snapshot()
+    matrix = getattr(snapshot, f"{name}_matrix")
+    index = InvertedIndex(matrix)
+
+    pruned = []
+    search_tiers = index._search_tiers
+    def spy(*args):
+        found = search_tiers(*args)
+        pruned.append(found is not None)
+        return found
+    index._search_tiers = spy
+
+    rng = np.random.default_rng(2)
+    queries = encoded_rows(snapshot.startup_matrix, rng.choice(len(snapshot.startup_matrix), 40, replace=False))
+    for encoded in queries:
+        weights = random_weights(rng)
+        scores, sims = matrix.score_rows(matrix.prepare(encoded, weights), return_similarities=True)
+        for k, min_score in ((6, 0.1), (6, None), (1, 0.5), (None, 0.3)):
+            rows, found_scores, found_sims = index.search(encoded, k, min_score, with_similarities=True,
+                                                          feature_weights=weights)
+            if k is None:
+                expected = np.flatnonzero(scores > min_score)
+            else:
+                expected = select_top_k(scores, k, min_score)
+            assert rows.tolist() == expected.tolist()
+            np.testing.assert_array_equal(found_scores, scores[expected])
+            np.testing.assert_array_equal(found_sims, sims[expected])
+    assert any(pruned), "no query stopped early, so the pruning path was not exercised"
@@ -0,0 +1,49 @@
+import copy
+import json
+import os
+
+import script
+
+
+def write_catalog(path, investors):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(investors, f, ensure_ascii=False, indent=2)
+
+
+def read_outputs(data_dir):
+    return {name: open(os.path.join(data_dir, name), "rb").read()
+            for name in sorted(os.listdir(data_dir)) if name != "investors.json"}
+
+
+def test_incremental_build_matches_full_build(tmp_path):
+    with open(script.INVESTOR_DATA_FILE, encoding="utf-8") as f:
+        investors = json.load(f)
+
+    incremental_dir, full_dir = tmp_path / "incremental", tmp_path / "full"
+    incremental_dir.mkdir()
+    full_dir.mkdir()
+    write_catalog(incremental_dir / "investors.json", investors)
+    script.build_catalog(str(incremental_dir / "investors.json"), str(incremental_dir), workers=1)
+
+    # One changed, one deleted, one inserted mid-file and one appended investor
+    changed = copy.deepcopy(investors)
+    changed[3]["Location"] = investors[40]["Location"] if investors[40]["Location"] != investors[3]["Location"] \
+        else investors[41]["Location"]
+    changed[3]["Investor Bio"] = "Now leading seed rounds only."
+    del changed[10]
+    inserted = dict(copy.deepcopy(investors[20]), Name="Inserted Ventures")
+    changed.insert(50, inserted)
+    changed.append(dict(copy.deepcopy(investors[30]), Name="Appended Capital"))
+
+    write_catalog(incremental_dir / "investors.json", changed)
+    total, reencoded = script.incremental_build(str(incremental_dir / "investors.json"), str(incremental_dir),
+                                                workers=1)
+    assert (total, reencoded) == (len(changed), 3)
+
+    write_catalog(full_dir / "investors.json", changed)
+    script.build_catalog(str(full_dir / "investors.json"), str(full_dir), workers=1)
+
+    incremental, full = read_outputs(incremental_dir), read_outputs(full_dir)
+    assert sorted(incremental) == sorted(full)
+    for name in full:
+        assert incremental[name] == full[name], f"{name} differs from a full build"
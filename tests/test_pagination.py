@@ -0,0 +1,27 @@
+from recommender_engine import get_recommendations, get_recommendation_page
+from schemas import validate_recommend_request
+
+PAGE_SIZE = 7
+
+
+def all_pages(data):
+    results, offset = [], 0
+    while offset is not None:
+        page = get_recommendation_page(data, PAGE_SIZE, offset)
+        assert len(page.results) <= PAGE_SIZE
+        results += page.results
+        offset = page.next_offset
+    return results
+
+
+def test_pages_join_into_the_full_ranking(payloads):
+    multi_page = 0
+    for i, payload in enumerate(payloads):
+        data, errors = validate_recommend_request(dict(payload, pageSize=PAGE_SIZE, explain=i % 3 == 0))
+        assert not errors
+        joined = all_pages(data)
+        multi_page += len(joined) > PAGE_SIZE
+
+        # The pages hold the whole ranking: asking for more returns nothing else
+        assert joined == get_recommendations(data, top_k=len(joined) + PAGE_SIZE)
+    assert multi_page > len(payloads) // 2
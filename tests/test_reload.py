@@ -0,0 +1,44 @@
+import threading
+import time
+
+import recommender_engine as engine
+
+
+def wait_for_reload(timeout=10):
+    deadline = time.monotonic() + timeout
+    while engine._reload_state["reloading"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not engine._reload_state["reloading"]
+
+
+def test_second_reload_returns_at_once_while_one_runs(monkeypatch):
+    snapshot = engine.current_snapshot()
+    release = threading.Event()
+
+    def slow_load(data_dir, version):
+        release.wait(10)
+        return snapshot
+
+    monkeypatch.setattr(engine, "load_snapshot", slow_load)
+    monkeypatch.setattr(engine, "_SNAPSHOT", snapshot)
+    try:
+        assert engine.reload_in_background() is True
+        start = time.monotonic()
+        assert engine.reload_in_background() is False
+        # Answered without waiting for the running load to finish
+        assert time.monotonic() - start < 1
+    finally:
+        release.set()
+        wait_for_reload()
+
+
+def test_failed_first_load_is_reported(monkeypatch):
+    def failing_load(data_dir, version):
+        raise OSError("feature_store.npz is missing")
+
+    monkeypatch.setattr(engine, "load_snapshot", failing_load)
+    monkeypatch.setattr(engine, "_SNAPSHOT", None)
+    monkeypatch.setitem(engine._reload_state, "last_error", None)
+    assert engine.reload_in_background() is True
+    wait_for_reload()
+    assert engine._reload_state["last_error"] == "feature_store.npz is missing"
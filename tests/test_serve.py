@@ -0,0 +1,34 @@
+import os
+import time
+import logging
+
+import serve
+
+
+def test_worker_that_fails_to_start_exits(monkeypatch, caplog):
+    """A worker whose server can't be created exits; the master reaps it instead of the child running its loop."""
+    def broken_make_server(*args, **kwargs):
+        raise OSError("cannot bind")
+
+    monkeypatch.setattr(serve, "make_server", broken_make_server)
+    sock = serve.listen("127.0.0.1", 0, 8)
+    master = serve.Master(None, sock, "127.0.0.1", sock.getsockname()[1], workers=1)
+    parent = os.getpid()
+    try:
+        with caplog.at_level(logging.WARNING, logger="matchmaker.serve"):
+            master.spawn()
+            # Only the master gets here: a child returning from spawn() would fail the test in its own process
+            assert os.getpid() == parent
+            (pid,) = master.children
+
+            deadline = time.monotonic() + 30
+            while master.children and time.monotonic() < deadline:
+                time.sleep(0.05)
+                master.reap()
+    finally:
+        for pid in list(master.children):
+            master._signal(pid, 9)
+        sock.close()
+
+    assert not master.children
+    assert f"Worker {pid} exited with status 256" in caplog.text
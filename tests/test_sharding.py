@@ -0,0 +1,44 @@
+import logging
+
+import pytest
+
+import recommender_engine as engine
+import sharding
+from schemas import validate_recommend_request
+
+PAGE_SIZE = 5
+
+
+def outputs(payloads):
+    """Every payload's /recommend results and first two pages, ranked afresh."""
+    engine.RESULT_CACHE.clear()
+    engine.RANKED_CACHE.clear()
+    results = []
+    for payload in payloads:
+        data, errors = validate_recommend_request(payload)
+        assert not errors
+        first = engine.get_recommendation_page(data, PAGE_SIZE, 0)
+        second = engine.get_recommendation_page(data, PAGE_SIZE, PAGE_SIZE) if first.next_offset else None
+        results.append((engine.get_recommendations(data), first.results, second and second.results))
+    return results
+
+
+@pytest.fixture
+def shards(monkeypatch):
+    monkeypatch.setattr(sharding, "SHARDS", 3)
+    monkeypatch.setattr(sharding, "MIN_SHARDED_ROWS", 1)
+    yield
+    sharding.close_shard_pool()
+
+
+def test_sharded_scoring_matches_in_process(payloads, shards, caplog, monkeypatch):
+    with monkeypatch.context() as m:
+        m.setattr(sharding, "SHARDS", 0)
+        expected = outputs(payloads)
+
+    with caplog.at_level(logging.ERROR):
+        found = outputs(payloads)
+    # A failing shard falls back to in-process scoring, which would hide a sharding bug
+    assert "Sharded scoring failed" not in caplog.text
+    assert sharding._pool is not None and not sharding._pool.broken
+    assert found == expected
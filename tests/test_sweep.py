@@ -0,0 +1,31 @@
+import random
+
+from recommender_engine import get_recommendations, sweep_recommendations
+from schemas import validate_recommend_request, validate_sweep_request
+from scoring import FEATURE_KEYS
+
+
+def weight_sets(rng):
+    """The base weights plus featureWeights overrides of a few groups, some switched off."""
+    overrides = [{key: rng.choice([0.0, 0.2, 0.5, 1.0]) for key in rng.sample(FEATURE_KEYS, 3)} for _ in range(4)]
+    return [{}] + overrides + [{"industry_vec": 1.0, "stage_vec": 0.0}]
+
+
+def test_sweep_matches_one_recommend_per_weight_set(payloads):
+    rng = random.Random(1)
+    reweighted = 0
+    for i, payload in enumerate(payloads):
+        sets = weight_sets(rng)
+        payload = dict(payload, explain=i % 3 == 0)
+        data, errors = validate_sweep_request(dict(payload, weightSets=sets))
+        assert not errors
+        sweep = sweep_recommendations(data, data["weightSets"])
+
+        assert len(sweep) == len(sets)
+        reweighted += any(results != sweep[0] for results in sweep)
+        for weights, results in zip(sets, sweep):
+            single, errors = validate_recommend_request(dict(payload, featureWeights=weights) if weights else payload)
+            assert not errors
+            assert results == get_recommendations(single)
+    # The overrides change most rankings, so the comparison covers more than the base weights
+    assert reweighted > len(payloads) // 2